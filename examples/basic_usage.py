@@ -7,6 +7,7 @@ using the napari-cocoutils plugin in different ways.
 """
 
 import napari
+import numpy as np
 from pathlib import Path
 import sys
 import os
@@ -44,7 +45,8 @@ def example_1_direct_reader():
     # Analyze the data
     shapes_data, metadata, layer_type = layers[0]
     num_shapes = len(shapes_data)
-    categories = set(prop['category_name'] for prop in metadata['properties'])
+    # Properties are columnar: one array per field, one entry per shape
+    categories = set(metadata['properties']['category_name'])
     
     print(f"   - Layer type: {layer_type}")
     print(f"   - Number of shapes: {num_shapes}")
@@ -176,23 +178,18 @@ def example_3_programmatic_filtering():
         viewer = napari.Viewer()
         shapes_data, metadata, layer_type = layers[0]
         
-        # Filter the loaded data by category
-        filtered_data = []
-        filtered_properties = []
-        filtered_colors = []
-        
-        for i, prop in enumerate(metadata['properties']):
-            if prop['category_id'] in selected:
-                filtered_data.append(shapes_data[i])
-                filtered_properties.append(prop)
-                filtered_colors.append(metadata['face_color'][i])
+        # Filter the loaded data by category with one mask over the property columns
+        properties = metadata['properties']
+        keep = np.flatnonzero(np.isin(properties['category_id'], selected))
+        filtered_data = [shapes_data[i] for i in keep]
+        filtered_colors = metadata['face_color'][keep]
         
         # Create filtered metadata
         filtered_metadata = metadata.copy()
-        filtered_metadata['properties'] = filtered_properties
+        filtered_metadata['properties'] = {name: column[keep] for name, column in properties.items()}
         filtered_metadata['face_color'] = filtered_colors
         filtered_metadata['edge_color'] = filtered_colors
-        filtered_metadata['shape_type'] = ['polygon'] * len(filtered_data)
+        filtered_metadata['shape_type'] = [metadata['shape_type'][i] for i in keep]
         filtered_metadata['name'] = f'Filtered COCO ({len(filtered_data)} shapes)'
         
         # Add to viewer
@@ -7,6 +7,9 @@ concerns and improved maintainability.
 """
 
 from typing import Dict, List, Any, Optional, Callable, Tuple
+from functools import lru_cache
+import importlib.util
+import logging
 import numpy as np
 from pathlib import Path
 from napari import Viewer
@@ -14,14 +17,32 @@ from napari import Viewer
 from ._utils import (
     load_coco_file, 
     get_category_info, 
-    get_image_annotations,
-    filter_annotations_by_category,
     generate_category_colors,
+    build_annotation_index,
+    AnnotationIndex,
     CocoError
 )
 from ._visualization import CocoNapariVisualizer
 from ._config import get_effective_config
-from ._memory import get_memory_manager, memory_efficient_operation, ResourceTracker
+from ._memory import get_memory_manager, memory_efficient_operation, ResourceTracker, LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Annotation count results kept per DisplayController, least recently used dropped first
+COUNT_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=None)
+def _check_triangle_available() -> bool:
+    """Warn once when the ``triangle`` package is missing for shapes meshing."""
+    if importlib.util.find_spec("triangle") is None:
+        logger.warning(
+            "Optional dependency 'triangle' is not installed; napari will fall back "
+            "to slower polygon triangulation. Install it with "
+            "'pip install napari-cocoutils[performance]'."
+        )
+        return False
+    return True
 
 
 class CocoFileManager:
@@ -31,6 +52,8 @@ class CocoFileManager:
         """Initialize file manager with empty state."""
         self.coco_data: Optional[Dict[str, Any]] = None
         self.file_path: Optional[Path] = None
+        self._annotation_index: Optional[AnnotationIndex] = None
+        self._index_source: Optional[Dict[str, Any]] = None
         
     def load_file(self, file_path: str) -> Dict[str, Any]:
         """Load COCO file and store data internally."""
@@ -38,6 +61,16 @@ class CocoFileManager:
         self.file_path = Path(file_path)
         return self.coco_data
     
+    @property
+    def annotation_index(self) -> Optional[AnnotationIndex]:
+        """Columnar annotation index for the loaded data, rebuilt when the data changes."""
+        if self.coco_data is None:
+            return None
+        if self._index_source is not self.coco_data:
+            self._annotation_index = build_annotation_index(self.coco_data)
+            self._index_source = self.coco_data
+        return self._annotation_index
+    
     def get_file_info(self) -> Dict[str, Any]:
         if not self.coco_data:
             return {}
@@ -58,9 +91,17 @@ class CategoryController:
     
     def __init__(self):
         """Initialize category controller with empty state."""
-        self.category_states: Dict[int, bool] = {}
         self.category_colors: Dict[int, tuple] = {}
         self.categories: Dict[int, Dict[str, Any]] = {}
+        # 8-bit RGBA per category position, shared by all widget styling lookups
+        self._color_lut: np.ndarray = np.empty((0, 4), dtype=np.uint8)
+        # Sorted category IDs and their visibility, aligned by position so that
+        # sparse, large or negative IDs never size or index the mask directly
+        self._category_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+        self._states: np.ndarray = np.zeros(0, dtype=bool)
+        self._selected: np.ndarray = np.empty(0, dtype=np.intp)
+        self._selected_dirty: bool = False
         
     def initialize_categories(self, coco_data: Dict[str, Any]):
         """Initialize categories from COCO data and generate colors."""
@@ -69,30 +110,81 @@ class CategoryController:
         
         sorted_cat_ids = sorted(self.categories.keys())
         self.category_colors = {cat_id: color_list[i] for i, cat_id in enumerate(sorted_cat_ids)}
+        self._color_lut = self._build_color_lut(color_list)
         
-        self.category_states = {cat_id: True for cat_id in self.categories.keys()}
+        self._category_ids = np.asarray(sorted_cat_ids, dtype=np.int64)
+        self._positions = {cat_id: i for i, cat_id in enumerate(sorted_cat_ids)}
+        self._states = np.ones(len(sorted_cat_ids), dtype=bool)
+        self._selected_dirty = True
+    
+    @staticmethod
+    def _build_color_lut(colors: List[tuple]) -> np.ndarray:
+        """Convert float RGBA colors, one per category position, to uint8 in one vectorized pass."""
+        if not colors:
+            return np.empty((0, 4), dtype=np.uint8)
+        return (np.asarray(colors, dtype=np.float64) * 255).astype(np.uint8)
+    
+    @property
+    def category_states(self) -> Dict[int, bool]:
+        """Visibility of each category as a ``{category_id: enabled}`` mapping."""
+        return dict(zip(self._positions, self._states.tolist()))
+    
+    def is_category_enabled(self, category_id: int) -> bool:
+        """Check whether a single category is currently visible."""
+        position = self._positions.get(category_id)
+        return position is not None and bool(self._states[position])
     
     def toggle_category(self, category_id: int, enabled: bool):
-        """Enable/disable specific category visibility."""
-        self.category_states[category_id] = enabled
+        """
+        Enable/disable specific category visibility.
+        
+        Raises
+        ------
+        KeyError
+            If ``category_id`` is not one of the loaded categories
+        """
+        position = self._positions.get(category_id)
+        if position is None:
+            raise KeyError(f"Unknown category ID: {category_id}")
+        self._states[position] = enabled
+        self._selected_dirty = True
     
-    def get_selected_categories(self) -> List[int]:
-        """Get list of currently enabled category IDs."""
-        return [cat_id for cat_id, enabled in self.category_states.items() if enabled]
+    def get_selected_categories(self) -> np.ndarray:
+        """
+        Get currently enabled category IDs.
+        
+        Returns
+        -------
+        numpy.ndarray
+            Read-only array of enabled category IDs, cached until a toggle
+        """
+        if self._selected_dirty:
+            self._selected = self._category_ids[self._states]
+            self._selected.flags.writeable = False
+            self._selected_dirty = False
+        return self._selected
     
     def select_all(self):
         """Enable all categories."""
-        for cat_id in self.category_states:
-            self.category_states[cat_id] = True
+        self._states[:] = True
+        self._selected_dirty = True
     
     def select_none(self):
         """Disable all categories."""
-        for cat_id in self.category_states:
-            self.category_states[cat_id] = False
+        self._states[:] = False
+        self._selected_dirty = True
     
     def get_category_color(self, category_id: int) -> tuple:
         """Get RGBA color tuple for specified category."""
         return self.category_colors.get(category_id, (1.0, 1.0, 1.0, 1.0))
+    
+    def get_category_rgb(self, category_id: int) -> Tuple[int, int, int]:
+        """Get 0-255 RGB triple for specified category, for widget styling."""
+        position = self._positions.get(category_id)
+        if position is None:
+            return 255, 255, 255  # Unknown categories are white, matching get_category_color
+        r, g, b = self._color_lut[position, :3].tolist()
+        return r, g, b
 
 
 class NavigationController:
@@ -170,9 +262,11 @@ class VisualizationManager:
         self.visualizer: Optional[CocoNapariVisualizer] = None
         self.n_filter_value: Optional[int] = None
         
-    def initialize_visualizer(self, coco_data: Dict[str, Any]):
-        """Initialize visualization components with COCO data."""
-        self.visualizer = CocoNapariVisualizer(coco_data)
+    def initialize_visualizer(self, coco_data: Dict[str, Any],
+                              annotation_index: Optional[AnnotationIndex] = None):
+        """Initialize visualization components with COCO data and an optional prebuilt index."""
+        _check_triangle_available()
+        self.visualizer = CocoNapariVisualizer(coco_data, annotation_index=annotation_index)
     
     def set_n_filter(self, value: int):
         """Set maximum number of annotations to display."""
@@ -237,10 +331,7 @@ class VisualizationManager:
             # Layer updates are faster than recreation but can fail due to napari constraints
             if self.current_shapes_layer and self.current_shapes_layer in self.viewer.layers:
                 try:
-                    self.current_shapes_layer.data = shapes_data
-                    for key, value in layer_kwargs.items():
-                        if key != 'name' and hasattr(self.current_shapes_layer, key):
-                            setattr(self.current_shapes_layer, key, value)
+                    self._update_layer_batched(shapes_data, layer_kwargs)
                     self.current_shapes_layer.name = layer_name
                 except Exception:
                     # Fallback when layer update constraints are violated
@@ -248,7 +339,31 @@ class VisualizationManager:
                     self.current_shapes_layer = self.viewer.add_shapes(shapes_data, **layer_kwargs)
             else:
                 self.current_shapes_layer = self.viewer.add_shapes(shapes_data, **layer_kwargs)
-    
+
+    def _update_layer_batched(self, shapes_data: List[np.ndarray], layer_kwargs: Dict[str, Any]):
+        """
+        Update the current shapes layer in place with a single redraw.
+
+        Every property assignment on a shapes layer re-meshes and redraws it, so
+        layer events are blocked while data and styling are replaced and the
+        layer is refreshed once afterwards. Layer-list events are deliberately
+        left alone: the canvas relies on them to create and drop visuals.
+
+        Parameters
+        ----------
+        shapes_data : list of numpy.ndarray
+            New shape vertices for the layer
+        layer_kwargs : dict
+            Layer attributes to apply (``name`` is handled by the caller)
+        """
+        layer = self.current_shapes_layer
+        with layer.events.blocker_all():
+            layer.data = shapes_data
+            for key, value in layer_kwargs.items():
+                if key != 'name' and hasattr(layer, key):
+                    setattr(layer, key, value)
+        layer.refresh()
+
     def _remove_current_layer(self):
         """Remove current shapes layer from viewer."""
         if self.current_shapes_layer and self.current_shapes_layer in self.viewer.layers:
@@ -268,10 +383,18 @@ class DisplayController:
         config = get_effective_config()
         self.n_filter_value: int = config.ui.default_n_filter
         self.random_seed: int = 42  # Fixed seed for consistent sampling
+        # Seed source for resampling; the seed itself keys the sampling cache
+        self._rng = np.random.default_rng()
         
         self.show_bounding_boxes: bool = True
         self.show_masks: bool = True
         
+        # Count results keyed by (image_id, categories), valid for one dataset;
+        # bounded because every image/selection combination adds an entry
+        self._count_cache: LRUCache[Dict[str, int]] = LRUCache(max_size=COUNT_CACHE_SIZE)
+        self._count_source: Optional[Dict[str, Any]] = None
+        self._count_index: Optional[AnnotationIndex] = None
+        
     def set_n_filter(self, value: int):
         """Set N-filter value with minimum constraint."""
         self.n_filter_value = max(1, value)
@@ -282,11 +405,16 @@ class DisplayController:
         self.show_bounding_boxes = show_bbox
         self.show_masks = show_mask
     
+    def clear_count_cache(self):
+        """Drop cached annotation counts and the references they hold to the dataset."""
+        self._count_cache.clear()
+        self._count_source = None
+        self._count_index = None
+    
     def resample(self):
         """Generate new random seed for resampling annotations."""
-        import random
-        self.random_seed = random.randint(1, 10000)
-        print(f"New random seed: {self.random_seed}")
+        self.random_seed = int(self._rng.integers(1, 10000, endpoint=True))
+        logger.debug("New random seed: %s", self.random_seed)
     
     def determine_default_display_modes(self, coco_data: Dict[str, Any]) -> Tuple[bool, bool]:
         """
@@ -322,10 +450,22 @@ class DisplayController:
     def get_annotation_count_info(self, 
                                 coco_data: Dict[str, Any], 
                                 image_id: int,
-                                selected_categories: List[int]) -> Dict[str, int]:
+                                selected_categories: List[int],
+                                annotation_index: Optional[AnnotationIndex] = None) -> Dict[str, int]:
         """
         Get annotation count information for current settings.
         
+        Parameters
+        ----------
+        coco_data : dict
+            COCO data structure
+        image_id : int
+            Image to count annotations for
+        selected_categories : array-like of int
+            Visible category IDs; empty means no category filter
+        annotation_index : AnnotationIndex, optional
+            Prebuilt index for ``coco_data``; built on first use if omitted
+        
         Returns
         -------
         dict
@@ -334,13 +474,25 @@ class DisplayController:
         if not coco_data:
             return {'visible': 0, 'total': 0}
         
-        total_annotations = len(coco_data.get('annotations', []))
-        
-        image_annotations = get_image_annotations(coco_data, image_id)
-        
-        if selected_categories:
-            image_annotations = filter_annotations_by_category(image_annotations, selected_categories)
+        # The widget asks again on every refresh; recount only when the
+        # dataset, image or category selection actually changes
+        if coco_data is not self._count_source:
+            self.clear_count_cache()
+            self._count_source = coco_data
+            self._count_index = (
+                annotation_index if annotation_index is not None
+                else build_annotation_index(coco_data)
+            )
+        key = (image_id, tuple(int(cat_id) for cat_id in selected_categories))
+        cached = self._count_cache.get(key)
+        if cached is not None:
+            return dict(cached)
         
-        visible_count = len(image_annotations)
+        # Only this image's annotations are checked against the selection
+        category_filter = selected_categories if len(selected_categories) > 0 else None
+        visible_count = len(self._count_index.select(image_id, category_filter))
+        total_annotations = len(self._count_index.category_ids)
         
-        return {'visible': visible_count, 'total': total_annotations}
\ No newline at end of file
+        info = {'visible': visible_count, 'total': total_annotations}
+        self._count_cache.put(key, info)
+        return dict(info)
\ No newline at end of file
@@ -5,21 +5,35 @@ This module implements the napari reader hook that detects and loads COCO JSON f
 converting them into appropriate napari layers (image + shapes) for visualization.
 """
 
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from itertools import chain
 import json
+import logging
+import math
+import mmap
+import os
+import re
+import sys
 import numpy as np
 from pathlib import Path
 from napari.types import LayerDataTuple
 
 from ._utils import (
-    load_coco_file, 
     validate_coco_structure, 
     get_image_annotations,
     get_category_info,
-    convert_coco_to_napari_coordinates,
-    generate_category_colors
+    generate_category_colors,
+    int_or_default
 )
 from ._progress import progress_context
+from ._memory import gc_paused
+
+try:
+    import orjson
+except ImportError:  # optional speedup, installed with the "performance" extra
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 
 def coco_reader(path: Union[str, List[str]]) -> Optional[List[LayerDataTuple]]:
@@ -27,8 +41,10 @@ def coco_reader(path: Union[str, List[str]]) -> Optional[List[LayerDataTuple]]:
     Read COCO JSON annotation file and return napari-compatible layer data.
     
     This function serves as the main napari reader hook for COCO files.
-    It validates the JSON structure, loads image and annotation data using
-    cocoutils, and converts the data into napari layer format.
+    It parses the JSON once, validates the COCO structure on that parsed
+    document, and converts the data into napari layer format. Nothing is
+    cached between calls, so the parsed document is released as soon as
+    the layers are built.
     
     Parameters
     ----------
@@ -48,13 +64,11 @@ def coco_reader(path: Union[str, List[str]]) -> Optional[List[LayerDataTuple]]:
             # Multiple files not supported - napari typically loads single annotation files
             return None
     
-    if not _is_coco_file(path):
-        return None
-    
     try:
-        with progress_context("Loading COCO file...", "console") as reporter:
+        with progress_context("Loading COCO file...", "console") as reporter, gc_paused():
             reporter.update(0, 2, "Loading COCO data")
-            coco_data = load_coco_file(path)
+            # Parse once: the same document is validated and then converted
+            coco_data = _parse_coco_file(path)
             
             if coco_data is None:
                 return None
@@ -66,7 +80,84 @@ def coco_reader(path: Union[str, List[str]]) -> Optional[List[LayerDataTuple]]:
             return result
             
     except Exception as e:
-        print(f"Error loading COCO file: {e}")
+        logger.error("Error loading COCO file: %s", e)
+        return None
+
+
+# A JSON object may only be preceded by whitespace; anything else cannot be COCO
+_JSON_OBJECT_START = re.compile(rb'[ \t\r\n]*\{')
+# Keys every COCO document must spell out somewhere in its bytes
+_COCO_KEYS = (b'"images"', b'"annotations"', b'"categories"')
+
+
+def _load_json(path: Union[str, Path], accept: Optional[Callable[[Any], bool]] = None) -> Any:
+    """
+    Parse a JSON file through a read-only memory map.
+    
+    orjson parses the mapped UTF-8 bytes in place when it is installed;
+    otherwise the stdlib parser is used.
+    
+    Parameters
+    ----------
+    path : str or Path
+        Path to the JSON file
+    accept : callable, optional
+        Cheap check on the raw mapped bytes. When it returns False the file
+        is not parsed and None is returned.
+        
+    Returns
+    -------
+    object or None
+        Parsed JSON value, or None if rejected by ``accept``
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise json.JSONDecodeError("Expecting value", "", 0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if accept is not None and not accept(mm):
+                return None
+            if orjson is not None:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+            return json.loads(mm[:])
+
+
+def _looks_like_coco(buffer) -> bool:
+    """
+    Reject files that cannot hold a COCO object without parsing them.
+    
+    The whole buffer is searched for the required keys rather than a fixed
+    head, since COCO writers may put ``annotations`` after megabytes of
+    ``images``. Searching a memory map is a plain byte scan, far cheaper
+    than decoding.
+    """
+    if _JSON_OBJECT_START.match(buffer) is None:
+        return False
+    return all(buffer.find(key) != -1 for key in _COCO_KEYS)
+
+
+def _parse_coco_file(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a JSON file and return its data if it has a valid COCO structure.
+    
+    Parameters
+    ----------
+    path : str
+        Path to JSON file to parse
+        
+    Returns
+    -------
+    dict or None
+        Parsed COCO data, or None if the file is not readable COCO JSON
+    """
+    try:
+        if not str(path).endswith('.json'):
+            return None
+        data = _load_json(path, accept=_looks_like_coco)
+        
+        return data if validate_coco_structure(data) else None
+        
+    except (FileNotFoundError, json.JSONDecodeError, Exception):
         return None
 
 
@@ -84,22 +175,101 @@ def _is_coco_file(path: str) -> bool:
     bool
         True if file contains valid COCO structure, False otherwise
     """
-    try:
-        if not str(path).endswith('.json'):
-            return False
-        with open(path, 'r') as f:
-            data = json.load(f)
+    return _parse_coco_file(path) is not None
+
+
+def bbox_array_to_polygons(bboxes: np.ndarray, dtype: Any = np.float64) -> np.ndarray:
+    """
+    Convert COCO bounding boxes to napari rectangle vertices in one pass.
+    
+    Parameters
+    ----------
+    bboxes : numpy.ndarray
+        Array of shape (N, 4) with rows [x, y, width, height]
+    dtype : numpy dtype, optional
+        Dtype of the returned vertices; corners are computed in float64
         
-        return validate_coco_structure(data)
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (N, 4, 2) with [row, col] vertices ordered top-left,
+        top-right, bottom-right, bottom-left
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    x, y, w, h = bboxes.T
+    out = np.empty((len(bboxes), 4, 2), dtype=dtype)
+    out[:, [0, 1], 0] = y[:, None]
+    out[:, [2, 3], 0] = (y + h)[:, None]
+    out[:, [0, 3], 1] = x[:, None]
+    out[:, [1, 2], 1] = (x + w)[:, None]
+    return out
+
+
+def flat_polygons_to_napari(coords: np.ndarray, lengths: np.ndarray,
+                            dtype: Any = np.float64) -> List[np.ndarray]:
+    """
+    Convert concatenated COCO polygons to napari vertex arrays in one pass.
+    
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        Flat array of all polygons' [x1, y1, x2, y2, ...] coordinates, back to back
+    lengths : numpy.ndarray
+        Number of vertices in each polygon, in the same order
+    dtype : numpy dtype, optional
+        Dtype of the returned vertices
         
-    except (FileNotFoundError, json.JSONDecodeError, Exception):
+    Returns
+    -------
+    list of numpy.ndarray
+        One (n_vertices, 2) [row, col] array per polygon; these are views into
+        a single buffer
+    """
+    points = np.ascontiguousarray(np.asarray(coords, dtype=dtype).reshape(-1, 2)[:, ::-1])
+    # Slice on precomputed offsets; np.split pays a swapaxes round trip per piece
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+    return [points[start:end] for start, end in zip(starts, ends)]
+
+
+# COCO pixel coordinates fit comfortably in single precision, which napari accepts
+_COORD_DTYPE = np.float32
+
+
+def _all_finite_numbers(values) -> bool:
+    """
+    Check every value is a finite number, without a Python-level loop.
+    
+    ``sum`` raises on strings, None and nested lists, and any NaN or
+    infinity makes the total non-finite.
+    """
+    try:
+        return math.isfinite(sum(values))
+    except TypeError:
         return False
 
 
+def _is_polygon(seg: Any) -> bool:
+    """Check a segmentation entry is a flat [x1, y1, ...] list of at least 3 numeric points."""
+    return (
+        isinstance(seg, (list, tuple)) and len(seg) >= 6 and len(seg) % 2 == 0
+        and _all_finite_numbers(seg)
+    )
+
+
+def _is_bbox(bbox: Any) -> bool:
+    """Check a bbox entry is an [x, y, width, height] list of finite numbers."""
+    return isinstance(bbox, (list, tuple)) and len(bbox) == 4 and _all_finite_numbers(bbox)
+
+
 def _convert_coco_to_napari(coco_data: Dict[str, Any], coco_path: str, reporter=None) -> List[LayerDataTuple]:
     """
     Convert COCO data structure to napari layer format.
     
+    All shapes go into a single layer tuple, ordered by category ID, so the
+    viewer builds them with one ``add_shapes`` call; adding shapes one call
+    at a time makes napari redo its per-layer bookkeeping on every call.
+    
     Parameters
     ----------
     coco_data : dict
@@ -115,82 +285,148 @@ def _convert_coco_to_napari(coco_data: Dict[str, Any], coco_path: str, reporter=
     layers = []
     
     categories = get_category_info(coco_data)
+    # Palette row per category plus a trailing white row for unknown IDs
+    palette = np.ones((len(categories) + 1, 4), dtype=np.float32)
     if categories:
-        category_colors = generate_category_colors(len(categories))
-        color_map = {cat_id: color for cat_id, color in zip(categories.keys(), category_colors)}
-    else:
-        color_map = {}
+        palette[:-1] = generate_category_colors(len(categories))
+    palette_index = {cat_id: i for i, cat_id in enumerate(categories)}
+    # One shared, interned name object per category instead of one per shape
+    name_table = {
+        cat_id: sys.intern(str(info.get('name', f'category_{cat_id}')))
+        for cat_id, info in categories.items()
+    }
     
     # Create shapes layer - image layers handled separately via file manager
     all_shapes = []
-    all_properties = []
     all_shape_types = []
-    all_colors = []
+    # Position in valid_indices of the annotation behind each shape
+    shape_sources = []
+    bbox_slots = []
+    bbox_values = []
+    polygon_slots = []
+    polygon_lengths = []
+    polygon_segments = []
+    polygon_coord_count = 0
     
     annotations = coco_data.get('annotations', [])
     total_annotations = len(annotations)
     
-    for i, annotation in enumerate(annotations):
+    # Decide which annotations can produce a shape in one pass: segmentation
+    # wins when present, otherwise a bbox needs exactly four finite numbers
+    has_segmentation = np.fromiter(
+        (bool(ann.get('segmentation')) for ann in annotations),
+        dtype=bool, count=total_annotations
+    )
+    has_bbox = np.fromiter(
+        (_is_bbox(ann.get('bbox')) for ann in annotations),
+        dtype=bool, count=total_annotations
+    )
+    use_bbox = ~has_segmentation & has_bbox
+    valid_indices = np.flatnonzero(has_segmentation | use_bbox).tolist()
+    
+    for source, i in enumerate(valid_indices):
         if reporter and i % 100 == 0:  # Update progress every 100 annotations
             reporter.update(i, total_annotations, f"Processing annotation {i+1}/{total_annotations}")
-        if 'segmentation' in annotation and annotation['segmentation']:
-            for seg in annotation['segmentation']:
-                if len(seg) >= 6:  # At least 3 points (6 coordinates)
-                    try:
-                        napari_points = convert_coco_to_napari_coordinates(seg)
-                        all_shapes.append(napari_points)
-                        all_shape_types.append('polygon')
-                        
-                        category_id = annotation.get('category_id', 1)
-                        category_name = categories.get(category_id, {}).get('name', f'category_{category_id}')
-                        all_properties.append({
-                            'category_id': category_id,
-                            'category_name': category_name,
-                            'annotation_id': annotation.get('id', 0),
-                            'area': annotation.get('area', 0)
-                        })
-                        
-                        color = color_map.get(category_id, (1.0, 1.0, 1.0, 1.0))
-                        all_colors.append(color)
-                    except Exception as e:
-                        print(f"Error processing segmentation: {e}")
-                        continue
+        annotation = annotations[i]
+        
+        if use_bbox[i]:
+            # Bounding box fallback; rectangle converted below together with all other bboxes
+            bbox_slots.append(len(all_shapes))
+            bbox_values.append(annotation['bbox'])
+            all_shapes.append(None)
+            # Rectangles get napari's fixed two-triangle mesh instead of polygon triangulation
+            all_shape_types.append('rectangle')
+            shape_sources.append(source)
+            continue
         
-        # Handle bounding box as fallback when no segmentation available
-        elif 'bbox' in annotation:
-            try:
-                x, y, w, h = annotation['bbox']
-                rect_points = np.array([
-                    [y, x],           # top-left
-                    [y, x + w],       # top-right
-                    [y + h, x + w],   # bottom-right
-                    [y + h, x]        # bottom-left
-                ])
-                all_shapes.append(rect_points)
+        for seg in annotation['segmentation']:
+            # Malformed polygons and RLE dicts are dropped here, before the shared
+            # buffer is filled, so one bad entry cannot fail the whole file
+            if _is_polygon(seg):
+                # Vertices filled in below from one flat coordinate buffer
+                polygon_slots.append(len(all_shapes))
+                polygon_lengths.append(len(seg) // 2)
+                polygon_segments.append(seg)
+                polygon_coord_count += len(seg)
+                all_shapes.append(None)
                 all_shape_types.append('polygon')
-                
-                # Add properties
-                category_id = annotation.get('category_id', 1)
-                category_name = categories.get(category_id, {}).get('name', f'category_{category_id}')
-                all_properties.append({
-                    'category_id': category_id,
-                    'category_name': category_name,
-                    'annotation_id': annotation.get('id', 0),
-                    'area': annotation.get('area', w * h)
-                })
-                
-                # Add color
-                color = color_map.get(category_id, (1.0, 1.0, 1.0, 1.0))
-                all_colors.append(color)
-            except Exception as e:
-                print(f"Error processing bbox: {e}")
-                continue
+                shape_sources.append(source)
+    
+    if polygon_segments:
+        # Stream coordinates into one buffer sized up front; no intermediate flat list
+        coords = np.fromiter(
+            chain.from_iterable(polygon_segments), dtype=_COORD_DTYPE, count=polygon_coord_count
+        )
+        polygons = flat_polygons_to_napari(
+            coords, np.asarray(polygon_lengths, dtype=np.intp), dtype=_COORD_DTYPE
+        )
+        for slot, napari_points in zip(polygon_slots, polygons):
+            all_shapes[slot] = napari_points
+    
+    if bbox_values:
+        # Stream boxes straight into one (N, 4) block; each rectangle is a view of the result
+        bboxes = np.fromiter(bbox_values, dtype=np.dtype((np.float64, 4)), count=len(bbox_values))
+        rectangles = bbox_array_to_polygons(bboxes, dtype=_COORD_DTYPE)
+        for slot, rect_points in zip(bbox_slots, rectangles):
+            all_shapes[slot] = rect_points
     
     if all_shapes:
+        # Property columns are read once per contributing annotation and then
+        # gathered per shape, so multi-polygon annotations cost nothing extra
+        valid_annotations = [annotations[i] for i in valid_indices]
+        count = len(valid_annotations)
+        # Null or non-integer IDs fall back to the defaults rather than failing the file
+        ann_category_ids = np.fromiter(
+            (int_or_default(ann.get('category_id'), 1) for ann in valid_annotations),
+            dtype=np.int64, count=count
+        )
+        ann_ids = np.fromiter(
+            (int_or_default(ann.get('id'), 0) for ann in valid_annotations),
+            dtype=np.int64, count=count
+        )
+        # Missing areas default to the box area for bbox shapes and 0 for polygons
+        ann_areas = np.fromiter(
+            (ann['area'] if 'area' in ann
+             else ann['bbox'][2] * ann['bbox'][3] if use_bbox[i] else 0
+             for i, ann in zip(valid_indices, valid_annotations)),
+            dtype=np.float64, count=count
+        )
+        
+        # Names and palette rows are resolved once per distinct category ID
+        unique_ids, ann_category_codes = np.unique(ann_category_ids, return_inverse=True)
+        unknown = len(categories)
+        unique_names = np.empty(len(unique_ids), dtype=object)
+        unique_rows = np.empty(len(unique_ids), dtype=np.intp)
+        for code, cat_id in enumerate(unique_ids.tolist()):
+            name = name_table.get(cat_id)
+            unique_names[code] = name if name is not None else sys.intern(f'category_{cat_id}')
+            unique_rows[code] = palette_index.get(cat_id, unknown)
+        
+        sources = np.asarray(shape_sources, dtype=np.intp)
+        shape_codes = ann_category_codes.ravel()[sources]
+        colors = palette[unique_rows[shape_codes]]
+        # Columnar properties: one array per field rather than a dict per shape
+        properties = {
+            'category_id': ann_category_ids[sources].astype(np.int32),
+            'category_name': unique_names.take(shape_codes),
+            'annotation_id': ann_ids[sources],
+            'area': ann_areas[sources],
+        }
+        
+        # Group shapes by category with one stable sort, keeping file order within a category
+        category_column = properties['category_id']
+        if np.any(category_column[1:] < category_column[:-1]):
+            order = np.argsort(category_column, kind='stable')
+            properties = {key: column[order] for key, column in properties.items()}
+            colors = colors[order]
+            order = order.tolist()
+            all_shapes = [all_shapes[i] for i in order]
+            all_shape_types = [all_shape_types[i] for i in order]
+        
         shapes_meta = {
-            'properties': all_properties,
-            'face_color': all_colors,
-            'edge_color': all_colors,
+            'properties': properties,
+            'face_color': colors,
+            'edge_color': colors,
             'shape_type': all_shape_types,
             'name': 'COCO Annotations'
         }
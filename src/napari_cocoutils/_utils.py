@@ -7,6 +7,7 @@ shared functionality between different plugin components.
 """
 
 from typing import Dict, List, Any, Optional, Union, Tuple, Protocol
+from dataclasses import dataclass
 import json
 import numpy as np
 from pathlib import Path
@@ -56,6 +57,137 @@ class CocoError(Exception):
         super().__init__(message)
 
 
+@dataclass(frozen=True)
+class AnnotationIndex:
+    """
+    Columnar view of annotation image and category IDs for vectorized filtering.
+    
+    Attributes
+    ----------
+    image_ids : numpy.ndarray
+        Image ID of every annotation, in annotation order
+    category_ids : numpy.ndarray
+        Category ID of every annotation, in annotation order
+    indices_by_image : dict
+        Mapping from image ID to the sorted positions of its annotations
+    """
+    image_ids: np.ndarray
+    category_ids: np.ndarray
+    indices_by_image: Dict[int, np.ndarray]
+    
+    def select(self, image_id: int, category_ids: Optional[Any] = None) -> np.ndarray:
+        """
+        Get positions of annotations on an image, optionally restricted to categories.
+        
+        Parameters
+        ----------
+        image_id : int
+            COCO image ID
+        category_ids : array-like of int, optional
+            Category IDs to keep, or None for all categories
+            
+        Returns
+        -------
+        numpy.ndarray
+            Positions into the annotation list, in ascending order
+        """
+        indices = self.indices_by_image.get(image_id, np.empty(0, dtype=np.intp))
+        if category_ids is not None:
+            indices = indices[np.isin(self.category_ids[indices], category_ids)]
+        return indices
+    
+    def category_counts(self) -> Dict[int, int]:
+        """Get number of annotations per category ID."""
+        unique_ids, counts = np.unique(self.category_ids, return_counts=True)
+        return dict(zip(unique_ids.tolist(), counts.tolist()))
+
+
+def int_or_default(value: Any, default: int) -> int:
+    """
+    Return an integer ID field, or the default when it is not integral.
+    
+    Integral floats such as ``2.0`` are kept as their integer value; None,
+    booleans, strings and fractional numbers fall back to the default.
+    
+    Parameters
+    ----------
+    value : Any
+        Raw ID value from the COCO file
+    default : int
+        Value used for missing or malformed IDs
+        
+    Returns
+    -------
+    int
+        Integer ID suitable for an integer numpy column
+    """
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return default
+
+
+def lookup_positions(sorted_ids: np.ndarray, ids: Any) -> np.ndarray:
+    """
+    Map IDs to their positions in a sorted ID array with one binary search.
+    
+    IDs that are not present map to ``len(sorted_ids)``, so a table with one
+    trailing fallback row can be indexed by the result directly.
+    
+    Parameters
+    ----------
+    sorted_ids : numpy.ndarray
+        Unique IDs in ascending order
+    ids : array-like of int
+        IDs to look up
+        
+    Returns
+    -------
+    numpy.ndarray
+        Position of each ID in ``sorted_ids``, or ``len(sorted_ids)`` if absent
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    positions = np.searchsorted(sorted_ids, ids)
+    if len(sorted_ids) == 0:
+        return positions
+    found = sorted_ids[np.minimum(positions, len(sorted_ids) - 1)] == ids
+    return np.where(found, positions, len(sorted_ids))
+
+
+def build_annotation_index(coco_data: Dict[str, Any]) -> AnnotationIndex:
+    """
+    Build a columnar annotation index from COCO data.
+    
+    Parameters
+    ----------
+    coco_data : dict
+        COCO data structure
+        
+    Returns
+    -------
+    AnnotationIndex
+        Image/category ID arrays and per-image annotation positions
+    """
+    annotations = coco_data.get('annotations', [])
+    count = len(annotations)
+    image_ids = np.fromiter(
+        (int_or_default(ann.get('image_id'), 0) for ann in annotations), dtype=np.int32, count=count
+    )
+    category_ids = np.fromiter(
+        (int_or_default(ann.get('category_id'), 0) for ann in annotations), dtype=np.int32, count=count
+    )
+    
+    # Group positions by image with one stable sort instead of a mask per image
+    order = np.argsort(image_ids, kind='stable')
+    unique_ids, starts = np.unique(image_ids[order], return_index=True)
+    indices_by_image = dict(zip(unique_ids.tolist(), np.split(order, starts[1:])))
+    
+    return AnnotationIndex(image_ids, category_ids, indices_by_image)
+
+
 def load_coco_file(file_path: Union[str, Path]) -> Dict[str, Any]:
     """
     Load and validate a COCO JSON file.
@@ -199,11 +331,13 @@ def filter_annotations_by_category(annotations: List[Dict[str, Any]],
     list of dict
         Filtered list of annotations
     """
-    if not category_ids:
+    if len(category_ids) == 0:
         return []
     
+    # Set membership keeps the filter O(A) for list and array inputs alike
+    selected = set(category_ids)
     return [ann for ann in annotations 
-            if ann.get('category_id') in category_ids]
+            if ann.get('category_id') in selected]
 
 
 def get_category_info(coco_data: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
@@ -237,13 +371,15 @@ def generate_category_colors(num_categories: int) -> List[Tuple[float, float, fl
     list of tuple
         List of RGBA color tuples (values 0-1) for napari compatibility
     """
-    import matplotlib.pyplot as plt
-    
     if num_categories == 0:
         return []
     
+    # The colormap registry avoids importing pyplot, whose backend setup
+    # dominates the first call
+    from matplotlib import colormaps
+    
     cmap_name = 'tab20' if num_categories <= 20 else 'hsv'
-    cmap = plt.colormaps.get_cmap(cmap_name)
+    cmap = colormaps.get_cmap(cmap_name)
     
     if num_categories <= 20:
         indices = np.arange(num_categories)
@@ -7,11 +7,15 @@ Adapts the cocoutils visualization logic for napari's layer system.
 """
 
 from typing import Dict, List, Tuple, Any, Optional
+import logging
 import numpy as np
 from napari.types import LayerDataTuple
 
 from ._config import get_effective_config
 from ._memory import get_memory_manager, LRUCache
+from ._utils import build_annotation_index, lookup_positions, AnnotationIndex
+
+logger = logging.getLogger(__name__)
 
 
 class CocoNapariVisualizer:
@@ -23,7 +27,7 @@ class CocoNapariVisualizer:
     napari layer formats with proper styling and interaction.
     """
     
-    def __init__(self, coco_data: Dict[str, Any]):
+    def __init__(self, coco_data: Dict[str, Any], annotation_index: Optional[AnnotationIndex] = None):
         """
         Initialize visualizer with COCO data.
         
@@ -31,6 +35,8 @@ class CocoNapariVisualizer:
         ----------
         coco_data : dict
             Loaded COCO JSON data structure
+        annotation_index : AnnotationIndex, optional
+            Prebuilt index of ``coco_data``; built here when not given
         """
         self.coco_data = coco_data
         self.categories = {cat['id']: cat for cat in coco_data.get('categories', [])}
@@ -38,11 +44,17 @@ class CocoNapariVisualizer:
         self.annotations = coco_data.get('annotations', [])
         
         # Pre-compute lookup arrays for vectorized filtering - critical for large datasets
-        self.ann_image_ids = np.array([ann.get('image_id', 0) for ann in self.annotations], dtype=np.int32)
-        self.ann_category_ids = np.array([ann.get('category_id', 0) for ann in self.annotations], dtype=np.int32)
+        self.annotation_index = (
+            annotation_index if annotation_index is not None
+            else build_annotation_index(coco_data)
+        )
+        self.ann_image_ids = self.annotation_index.image_ids
+        self.ann_category_ids = self.annotation_index.category_ids
         
         self.category_counts = self._compute_category_counts()
         self.category_colors = self._generate_category_colors()
+        self._color_lut_ids = np.asarray(sorted(self.categories), dtype=np.int64)
+        self._color_lut = self._build_color_lut()
         
         self.config = get_effective_config()
         
@@ -84,7 +96,7 @@ class CocoNapariVisualizer:
         LayerDataTuple or None
             Napari shapes layer data tuple, or None if no annotations
         """
-        cache_key = (image_id, tuple(sorted(category_filter)) if category_filter else None, show_bbox, show_mask, n_filter, random_seed)
+        cache_key = (image_id, self._category_filter_key(category_filter), show_bbox, show_mask, n_filter, random_seed)
         
         cached_result = self._shape_cache.get(cache_key)
         if cached_result is not None:
@@ -99,12 +111,12 @@ class CocoNapariVisualizer:
         # Apply N-filter sampling at annotation level (before shape conversion)
         if n_filter and len(annotations) > n_filter:
             annotations = self.subsample_annotations(annotations, n_filter, random_seed)
-            print(f"N-filter applied: {len(annotations)} annotations sampled from original total")
+            logger.debug("N-filter applied: %d annotations sampled from original total", len(annotations))
         
         shapes_data = []
         properties = []
-        face_colors = []
-        edge_colors = []
+        shape_category_ids = []
+        bbox_mask = []
         shape_types = []
         
         for annotation in annotations:
@@ -118,9 +130,8 @@ class CocoNapariVisualizer:
                         if napari_shape is not None:
                             shapes_data.append(napari_shape)
                             shape_types.append('polygon')
-                            color = self.category_colors.get(category_id, (1.0, 1.0, 1.0, 1.0))
-                            face_colors.append(color)  # Masks have filled faces
-                            edge_colors.append(color)
+                            shape_category_ids.append(category_id)
+                            bbox_mask.append(False)
                             properties.append({
                                 'category_id': category_id,
                                 'category_name': category_name,
@@ -138,9 +149,8 @@ class CocoNapariVisualizer:
                         shape_types.append('polygon')
                     else:
                         shape_types.append('rectangle')
-                    color = self.category_colors.get(category_id, (1.0, 1.0, 1.0, 1.0))
-                    face_colors.append((0.0, 0.0, 0.0, 0.0))  # Transparent face for bboxes
-                    edge_colors.append(color)  # Colored border
+                    shape_category_ids.append(category_id)
+                    bbox_mask.append(True)
                     properties.append({
                         'category_id': category_id,
                         'category_name': category_name,
@@ -154,11 +164,16 @@ class CocoNapariVisualizer:
         else:
             # Ensure consistent shape types - convert all to polygons if mixed types exist
             if show_bbox and show_mask and len(set(shape_types)) > 1:
-                print("Converting all shapes to polygons for consistent display")
+                logger.debug("Converting all shapes to polygons for consistent display")
                 for i, shape_type in enumerate(shape_types):
                     if shape_type == 'rectangle':
                         shape_types[i] = 'polygon'
             
+            # Single gather from the color table instead of a dict lookup per shape
+            edge_colors = self._color_lut[lookup_positions(self._color_lut_ids, shape_category_ids)]
+            face_colors = edge_colors.copy()  # Masks have filled faces
+            face_colors[np.asarray(bbox_mask, dtype=bool)] = 0.0  # Transparent face for bboxes
+            
             layer_kwargs = {
                 'properties': properties,
                 'face_color': face_colors,
@@ -203,24 +218,32 @@ class CocoNapariVisualizer:
         list of dict
             Selected COCO annotation dictionaries
         """
-        cache_key = (image_id, tuple(sorted(category_filter)) if category_filter else None)
+        filter_key = self._category_filter_key(category_filter)
+        cache_key = (image_id, filter_key)
         
         cached_annotations = self._annotation_cache.get(cache_key)
         if cached_annotations is not None:
             return cached_annotations
         
-        # Vectorized filtering is essential for performance with large datasets
-        mask = (self.ann_image_ids == image_id)
-        if category_filter:
-            mask &= np.isin(self.ann_category_ids, category_filter)
-        
-        indices = np.where(mask)[0]
+        # Per-image positions keep filtering proportional to the image, not the dataset
+        indices = self.annotation_index.select(image_id, filter_key)
         annotations = [self.annotations[i] for i in indices]
         
         estimated_size = len(annotations) * 200
         self._annotation_cache.put(cache_key, annotations, estimated_size)
         return annotations
     
+    @staticmethod
+    def _category_filter_key(category_filter) -> Optional[Tuple[int, ...]]:
+        """
+        Normalize a category filter (list or array of IDs) into a hashable cache key.
+        
+        An empty or missing filter yields None, meaning no category filtering.
+        """
+        if category_filter is None or len(category_filter) == 0:
+            return None
+        return tuple(sorted(int(cat_id) for cat_id in category_filter))
+    
     def subsample_annotations(self, annotations: List[Dict[str, Any]], sample_size: int, random_seed: int = 42) -> List[Dict[str, Any]]:
         """
         Subsample annotations to the specified sample size using random sampling.
@@ -247,9 +270,10 @@ class CocoNapariVisualizer:
             # No subsampling needed
             return annotations
         
-        rng = np.random.RandomState(random_seed)
+        # PCG64 Generator is much cheaper to seed and sample than legacy RandomState
+        rng = np.random.default_rng(random_seed)
         sample_size = min(sample_size, len(annotations))
-        indices = rng.choice(len(annotations), sample_size, replace=False)
+        indices = rng.choice(len(annotations), size=sample_size, replace=False)
         
         # Return subsampled annotations in original order
         indices = np.sort(indices)
@@ -395,14 +419,14 @@ class CocoNapariVisualizer:
             return {}
         
         try:
-            import matplotlib.pyplot as plt
+            from matplotlib import colormaps
         except ImportError:
             # Fallback when matplotlib unavailable
             return {cat_id: (1.0, 0.0, 0.0, 1.0) for cat_id in self.categories}
         
         # tab20 provides better visual distinction for small category counts
         cmap_name = 'tab20' if num_categories <= 20 else 'hsv'
-        cmap = plt.colormaps.get_cmap(cmap_name)
+        cmap = colormaps.get_cmap(cmap_name)
         
         # Vectorized generation avoids Python loops
         if num_categories <= 20:
@@ -414,6 +438,23 @@ class CocoNapariVisualizer:
         sorted_cat_ids = sorted(self.categories.keys())
         return {cat_id: tuple(colors[i]) for i, cat_id in enumerate(sorted_cat_ids)}
     
+    def _build_color_lut(self) -> np.ndarray:
+        """
+        Build an RGBA lookup table with one row per category, in sorted ID order.
+        
+        Rows line up with ``self._color_lut_ids``; a trailing white row serves
+        IDs without a category entry, matching the per-category fallback color.
+        
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (num_categories + 1, 4) with float32 RGBA rows
+        """
+        lut = np.ones((len(self._color_lut_ids) + 1, 4), dtype=np.float32)
+        if len(self._color_lut_ids) > 0:
+            lut[:-1] = [self.category_colors[cat_id] for cat_id in self._color_lut_ids.tolist()]
+        return lut
+    
     def _compute_category_counts(self) -> Dict[int, int]:
         """
         Pre-compute category annotation counts for fast UI updates.
@@ -427,8 +468,7 @@ class CocoNapariVisualizer:
             return {}
         
         # Vectorized counting is much faster than Python loops for large datasets
-        unique_ids, counts = np.unique(self.ann_category_ids, return_counts=True)
-        category_counts = dict(zip(unique_ids, counts))
+        category_counts = self.annotation_index.category_counts()
         
         # Ensure all categories are represented for consistent UI
         for cat_id in self.categories:
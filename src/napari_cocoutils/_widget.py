@@ -8,7 +8,9 @@ This module provides the primary user interface widget that allows users to:
 - Toggle visualization modes (overlay/masked)
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from functools import partial
+import logging
 import numpy as np
 from pathlib import Path
 from qtpy.QtWidgets import (
@@ -16,8 +18,9 @@ from qtpy.QtWidgets import (
     QLabel, QCheckBox, QComboBox, QFileDialog, QScrollArea,
     QLineEdit, QSlider, QSpinBox, QGroupBox, QSizePolicy
 )
-from qtpy.QtCore import Qt, Signal
+from qtpy.QtCore import Qt, Signal, QTimer
 from napari import Viewer
+from napari.utils.notifications import show_error
 import napari
 
 from ._utils import CocoError
@@ -29,6 +32,11 @@ from ._controllers import (
     DisplayController
 )
 
+logger = logging.getLogger(__name__)
+
+# Checkboxes built per event-loop pass; the first chunk covers the visible scroll area
+CATEGORY_CHUNK_SIZE = 20
+
 
 class CocoWidget(QWidget):
     """
@@ -57,6 +65,10 @@ class CocoWidget(QWidget):
         self.display_controller = DisplayController()
         
         self.category_checkboxes = {}
+        # Bumped on every category rebuild so stale deferred chunks stop populating
+        self._category_generation = 0
+        # Image list the combo box was last populated from; navigation never rebuilds it
+        self._combo_populated_for: Optional[List[Dict]] = None
         
         self._setup_ui()
     
@@ -283,18 +295,20 @@ class CocoWidget(QWidget):
         self.status_label.setStyleSheet("color: orange; font-size: 11px;")
         
         try:
-            # Add debugging information
-            from ._utils import diagnose_coco_file
-            print(f"Attempting to load COCO file: {file_path}")
-            print("Diagnostic information:")
-            print(diagnose_coco_file(file_path))
-            print("-" * 50)
+            logger.debug("Attempting to load COCO file: %s", file_path)
+            # Diagnosis re-reads the whole file, so only pay for it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                from ._utils import diagnose_coco_file
+                logger.debug("Diagnostic information:\n%s", diagnose_coco_file(file_path))
             
             coco_data = self.file_manager.load_file(file_path)
             
             self.category_controller.initialize_categories(coco_data)
             self.navigation_controller.initialize_images(coco_data)
-            self.visualization_manager.initialize_visualizer(coco_data)
+            # One annotation scan shared by the visualizer, category counts and display counts
+            self.visualization_manager.initialize_visualizer(
+                coco_data, annotation_index=self.file_manager.annotation_index
+            )
             
             # Initialize random seed for consistent sampling
             self.visualization_manager.set_random_seed(self.display_controller.random_seed)
@@ -317,19 +331,23 @@ class CocoWidget(QWidget):
                 f"✓ Loaded: {file_info['num_annotations']} annotations, "
                 f"{file_info['num_images']} images"
             )
+            # The status label reports success; a toast per load is noise when switching files
             self.status_label.setStyleSheet("color: green; font-size: 11px;")
             
             self._enable_controls()
             
         except CocoError as e:
+            self._reset_controllers()
+            self._reset_ui()
+            show_error(e.user_message)
             self.status_label.setText(f"✗ {e.user_message}")
             self.status_label.setStyleSheet("color: red; font-size: 11px;")
-            self._reset_controllers()
         except Exception as e:
-            import traceback
             error_msg = str(e)
-            print(f"Error loading COCO file: {error_msg}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error loading COCO file: %s", error_msg)
+            self._reset_controllers()
+            self._reset_ui()
+            show_error(f"Error loading COCO file: {error_msg}")
             
             # Show more specific error information to user
             if "KeyError" in str(type(e)):
@@ -344,13 +362,48 @@ class CocoWidget(QWidget):
                 self.status_label.setText(f"✗ Error loading COCO file: {error_msg[:50]}...")
             
             self.status_label.setStyleSheet("color: red; font-size: 11px;")
-            self._reset_controllers()
     
     def _reset_controllers(self):
+        self._category_generation += 1
+        self._combo_populated_for = None
         self.file_manager = CocoFileManager()
         self.category_controller = CategoryController()
         self.navigation_controller = NavigationController()
         self.visualization_manager.cleanup()
+        self.visualization_manager = VisualizationManager(self.viewer)
+        self.display_controller = DisplayController()
+    
+    def _reset_ui(self):
+        """Return every control to its freshly constructed state without emitting change signals."""
+        for checkbox in self.category_checkboxes.values():
+            self.category_layout.removeWidget(checkbox)
+            checkbox.setParent(None)
+            checkbox.deleteLater()
+        self.category_checkboxes.clear()
+        
+        self.file_path_label.setText("No file selected")
+        self.status_label.setText("Ready to load COCO file")
+        self.status_label.setStyleSheet("color: gray; font-size: 11px;")
+        self.annotation_count_label.setText("/ 0 total")
+        
+        signalling = (self.n_filter_spinbox, self.show_bbox_checkbox,
+                      self.show_mask_checkbox, self.image_combo)
+        for control in signalling:
+            control.blockSignals(True)
+        try:
+            self.n_filter_spinbox.setMaximum(10000)
+            self.n_filter_spinbox.setValue(1000)
+            self.show_bbox_checkbox.setChecked(True)
+            self.show_mask_checkbox.setChecked(True)
+            self.image_combo.clear()
+        finally:
+            for control in signalling:
+                control.blockSignals(False)
+        
+        for control in (self.select_all_btn, self.select_none_btn, self.n_filter_spinbox,
+                        self.resample_button, self.show_bbox_checkbox, self.show_mask_checkbox,
+                        self.image_combo, self.prev_btn, self.next_btn):
+            control.setEnabled(False)
         
     def on_category_toggled(self, category_id: int, enabled: bool):
         """
@@ -391,32 +444,87 @@ class CocoWidget(QWidget):
     def _update_category_controls(self):
         if not self.file_manager.is_loaded():
             return
-        for checkbox in self.category_checkboxes.values():
+        
+        categories = list(self.category_controller.categories.items())
+        category_counts = self.file_manager.annotation_index.category_counts()
+        self._category_generation += 1
+        
+        # Differential update: checkboxes for categories shared with the previous
+        # file are reused, only the difference is created or destroyed
+        current_ids = {cat_id for cat_id, _ in categories}
+        for cat_id in set(self.category_checkboxes) - current_ids:
+            checkbox = self.category_checkboxes.pop(cat_id)
+            self.category_layout.removeWidget(checkbox)
             checkbox.setParent(None)
-        self.category_checkboxes.clear()
+            checkbox.deleteLater()
         
-        categories = self.category_controller.categories
-        if not categories:
-            return
+        # First chunk is built synchronously, the rest streams in from the event loop
+        self._populate_category_chunk(categories, category_counts, 0, self._category_generation)
+    
+    def _populate_category_chunk(self, categories: List[Tuple[int, Dict]],
+                                 category_counts: Dict[int, int],
+                                 start: int, generation: int):
+        """
+        Create or update one chunk of category checkboxes, scheduling the next.
         
-        coco_data = self.file_manager.coco_data
+        Parameters
+        ----------
+        categories : list of tuple
+            (category ID, category info) pairs in display order
+        category_counts : dict
+            Mapping from category ID to annotation count
+        start : int
+            Position of the first category in this chunk
+        generation : int
+            Rebuild generation this chunk belongs to; outdated chunks are dropped
+        """
+        if generation != self._category_generation:
+            return
         
-        for cat_id, category in categories.items():
-            count = sum(1 for ann in coco_data.get('annotations', []) 
-                       if ann.get('category_id') == cat_id)
-            
-            checkbox = QCheckBox(f"{category['name']} ({count})")
-            checkbox.setChecked(self.category_controller.category_states[cat_id])
-            checkbox.stateChanged.connect(
-                lambda state, cid=cat_id: self.on_category_toggled(cid, state == Qt.Checked)
-            )
-            
-            color = self.category_controller.get_category_color(cat_id)
-            color_style = f"color: rgb({int(color[0]*255)}, {int(color[1]*255)}, {int(color[2]*255)});"
-            checkbox.setStyleSheet(f"font-weight: bold; {color_style}")
-            
-            self.category_checkboxes[cat_id] = checkbox
-            self.category_layout.addWidget(checkbox)
+        end = min(start + CATEGORY_CHUNK_SIZE, len(categories))
+        self.category_widget.setUpdatesEnabled(False)
+        try:
+            for position in range(start, end):
+                cat_id, category = categories[position]
+                
+                checkbox = self.category_checkboxes.get(cat_id)
+                if checkbox is None:
+                    checkbox = QCheckBox()
+                    checkbox.setProperty("cat_id", cat_id)
+                    checkbox.stateChanged.connect(self._on_category_checkbox)
+                    self.category_checkboxes[cat_id] = checkbox
+                
+                self._apply_category_checkbox_state(
+                    checkbox, cat_id, category, category_counts.get(cat_id, 0))
+                
+                if self.category_layout.indexOf(checkbox) != position:
+                    self.category_layout.removeWidget(checkbox)
+                    self.category_layout.insertWidget(position, checkbox)
+        finally:
+            self.category_widget.setUpdatesEnabled(True)
+        
+        if end < len(categories):
+            # The widget is the timer's context, so a pending chunk is dropped if it is deleted
+            QTimer.singleShot(0, self, partial(
+                self._populate_category_chunk, categories, category_counts, end, generation))
+    
+    def _apply_category_checkbox_state(self, checkbox: QCheckBox, cat_id: int,
+                                       category: Dict, count: int):
+        """Set label, color and checked state of a category checkbox without emitting toggles."""
+        checkbox.setText(f"{category['name']} ({count})")
+        
+        r, g, b = self.category_controller.get_category_rgb(cat_id)
+        color_style = f"color: rgb({r}, {g}, {b});"
+        checkbox.setStyleSheet(f"font-weight: bold; {color_style}")
+        
+        checkbox.blockSignals(True)
+        checkbox.setChecked(self.category_controller.is_category_enabled(cat_id))
+        checkbox.blockSignals(False)
+    
+    def _on_category_checkbox(self, state: int):
+        """Route a category checkbox toggle using the category ID stored on the sender."""
+        checkbox = self.sender()
+        self.on_category_toggled(checkbox.property("cat_id"), state == Qt.Checked)
     
     def _refresh_visualization(self):
         if not self.file_manager.is_loaded():
@@ -445,9 +553,8 @@ class CocoWidget(QWidget):
             self._update_annotation_count()
         
         except Exception as e:
-            import traceback
-            print(f"Error refreshing visualization: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error refreshing visualization: %s", e)
+            show_error(f"Visualization error: {str(e)}")
             self.status_label.setText(f"✗ Visualization error: {str(e)[:40]}...")
             self.status_label.setStyleSheet("color: red; font-size: 11px;")
     
@@ -456,9 +563,18 @@ class CocoWidget(QWidget):
             return
         
         images = self.navigation_controller.images
-        self.image_combo.clear()
-        for i, img in enumerate(images):
-            self.image_combo.addItem(f"{i+1}: {img['file_name']}")
+        if self._combo_populated_for is images:
+            return
+        
+        # Rebuilding emits currentIndexChanged per item; the caller refreshes once instead
+        self.image_combo.blockSignals(True)
+        try:
+            self.image_combo.clear()
+            self.image_combo.addItems([f"{i+1}: {img['file_name']}" for i, img in enumerate(images)])
+            self.image_combo.setCurrentIndex(self.navigation_controller.current_image_idx)
+        finally:
+            self.image_combo.blockSignals(False)
+        self._combo_populated_for = images
         
         has_multiple = self.navigation_controller.has_multiple_images()
         self.image_combo.setEnabled(has_multiple)
@@ -473,7 +589,8 @@ class CocoWidget(QWidget):
             return
         selected_categories = self.category_controller.get_selected_categories()
         count_info = self.display_controller.get_annotation_count_info(
-            self.file_manager.coco_data, current_image_id, selected_categories
+            self.file_manager.coco_data, current_image_id, selected_categories,
+            annotation_index=self.file_manager.annotation_index
         )
         
         self.annotation_count_label.setText(
@@ -540,18 +657,24 @@ class CocoWidget(QWidget):
                 self.show_bbox_checkbox.setChecked(True)
                 show_bbox = True
         
-        print(f"Display mode changed: bbox={show_bbox}, mask={show_mask}")
+        logger.debug("Display mode changed: bbox=%s, mask=%s", show_bbox, show_mask)
         self.display_controller.set_annotation_display_mode(show_bbox, show_mask)
         self._refresh_visualization()
     
     def _on_prev_image(self):
         if self.navigation_controller.go_previous():
-            self.image_combo.setCurrentIndex(self.navigation_controller.current_image_idx)
+            self._sync_image_combo()
             self._refresh_visualization()
             self._update_navigation_buttons()
     
     def _on_next_image(self):
         if self.navigation_controller.go_next():
-            self.image_combo.setCurrentIndex(self.navigation_controller.current_image_idx)
+            self._sync_image_combo()
             self._refresh_visualization()
-            self._update_navigation_buttons()
\ No newline at end of file
+            self._update_navigation_buttons()
+    
+    def _sync_image_combo(self):
+        """Move the combo selection to the current image without re-triggering navigation."""
+        self.image_combo.blockSignals(True)
+        self.image_combo.setCurrentIndex(self.navigation_controller.current_image_idx)
+        self.image_combo.blockSignals(False)
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Shared pytest fixtures for the napari-cocoutils test suite.
+
+Fixtures here are session-scoped so that sample data and file-existence
+checks are evaluated once per test run rather than once per test.
+"""
+
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, create_autospec
+
+import pytest
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is fine for the tiny sample data
+    orjson = None
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--integration",
+        action="store_true",
+        default=False,
+        help="run tests marked 'integration' that load the real sample dataset",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--integration"):
+        return
+    skip_integration = pytest.mark.skip(reason="need --integration option to run")
+    for item in items:
+        if item.get_closest_marker("integration") is not None:
+            item.add_marker(skip_integration)
+
+
+def _dump_json(data) -> bytes:
+    """Serialize test data to JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+# Root of the real sample dataset (test.json plus data/objects_reconstructed/*.tiff).
+# Point NAPARI_COCOUTILS_SAMPLE_DATA at a local or CI-cached copy to run the
+# integration and performance tests; they are skipped when it is absent.
+SAMPLE_DATA_DIR = Path(
+    os.environ.get("NAPARI_COCOUTILS_SAMPLE_DATA", Path(__file__).parent / "data")
+)
+SAMPLE_COCO_FILE = SAMPLE_DATA_DIR / "test.json"
+SAMPLE_IMAGES = [
+    SAMPLE_DATA_DIR / "data" / "objects_reconstructed" / "coli_mask_frame_223.tiff",
+    SAMPLE_DATA_DIR / "data" / "objects_reconstructed" / "mabs_img_01.tiff",
+]
+
+
+@pytest.fixture(scope="session")
+def real_coco_file():
+    """Fixture providing real COCO test file path."""
+    if not SAMPLE_COCO_FILE.exists():
+        pytest.skip(
+            f"Sample COCO file not found: {SAMPLE_COCO_FILE} "
+            "(set NAPARI_COCOUTILS_SAMPLE_DATA to the sample data directory)"
+        )
+    return str(SAMPLE_COCO_FILE)
+
+
+@pytest.fixture(scope="session")
+def real_image_files():
+    """Fixture providing real image file paths."""
+    available_images = [str(img_path) for img_path in SAMPLE_IMAGES if img_path.exists()]
+    if not available_images:
+        pytest.skip("No sample images found")
+    return available_images
+
+
+@pytest.fixture(scope="session")
+def sample_coco_data():
+    """Sample COCO data for testing (shared; tests must not mutate it)."""
+    return {
+        'images': [
+            {'id': 1, 'file_name': 'image1.jpg', 'width': 640, 'height': 480},
+            {'id': 2, 'file_name': 'image2.jpg', 'width': 800, 'height': 600}
+        ],
+        'categories': [
+            {'id': 1, 'name': 'person'},
+            {'id': 2, 'name': 'car'}
+        ],
+        'annotations': [
+            {
+                'id': 1, 'image_id': 1, 'category_id': 1,
+                'segmentation': [[10, 10, 50, 10, 50, 50, 10, 50]],
+                'area': 1600, 'bbox': [10, 10, 40, 40]
+            },
+            {
+                'id': 2, 'image_id': 1, 'category_id': 2,
+                'segmentation': [[100, 100, 150, 100, 150, 150, 100, 150]],
+                'area': 2500, 'bbox': [100, 100, 50, 50]
+            },
+            {
+                'id': 3, 'image_id': 2, 'category_id': 1,
+                'segmentation': [[20, 20, 60, 20, 60, 60, 20, 60]],
+                'area': 1600, 'bbox': [20, 20, 40, 40]
+            }
+        ]
+    }
+
+
+@pytest.fixture(scope="session")
+def annotation_counts(sample_coco_data):
+    """Annotation counts keyed by (image_id, category_id) for the sample data."""
+    counts = {}
+    for ann in sample_coco_data['annotations']:
+        key = (ann['image_id'], ann['category_id'])
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+@pytest.fixture(scope="session")
+def temp_coco_file(tmp_path_factory, sample_coco_data):
+    """Write the sample COCO data once per session to pytest's temp directory."""
+    path = tmp_path_factory.mktemp("coco") / "sample.json"
+    path.write_bytes(_dump_json(sample_coco_data))
+    return str(path)
+
+
+class FakeLayers(list):
+    """List-backed stand-in for ``viewer.layers``; membership and removal are real."""
+
+
+@pytest.fixture(scope="module")
+def viewer_spec_cls():
+    """napari.Viewer class used as the mock spec, imported once per module."""
+    napari = pytest.importorskip("napari")
+    return napari.Viewer
+
+
+@pytest.fixture(scope="class")
+def fake_viewer():
+    """
+    Plain stand-in viewer for tests that never inspect viewer calls.
+    
+    A SimpleNamespace records nothing, so it carries none of a mock's per-call
+    bookkeeping and can be shared by a whole test class; use ``mock_viewer``
+    when a test asserts on viewer calls.
+    """
+    return SimpleNamespace(layers=FakeLayers(), add_shapes=lambda *args, **kwargs: SimpleNamespace())
+
+
+@pytest.fixture
+def mock_viewer(viewer_spec_cls):
+    """
+    Fresh autospecced viewer mock for tests that assert on viewer calls.
+    
+    ``create_autospec`` checks call signatures as well as attribute names;
+    ``layers`` is an empty FakeLayers and ``add_shapes`` returns a new layer mock.
+    """
+    viewer = create_autospec(viewer_spec_cls, instance=True)
+    viewer.layers = FakeLayers()
+    viewer.add_shapes = MagicMock(return_value=MagicMock())
+    return viewer
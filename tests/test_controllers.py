@@ -6,56 +6,66 @@ different aspects of COCO data management and visualization.
 """
 
 import pytest
-import json
-import tempfile
+import numpy as np
+from contextlib import contextmanager
 from pathlib import Path
-from unittest.mock import Mock
+from types import SimpleNamespace
 
 from napari_cocoutils._controllers import (
     CocoFileManager, CategoryController, NavigationController,
     VisualizationManager, DisplayController
 )
-from napari_cocoutils._utils import CocoError
+from napari_cocoutils._utils import CocoError, build_annotation_index
 
 
 @pytest.fixture
-def sample_coco_data():
-    """Sample COCO data for testing."""
-    return {
-        'images': [
-            {'id': 1, 'file_name': 'image1.jpg', 'width': 640, 'height': 480},
-            {'id': 2, 'file_name': 'image2.jpg', 'width': 800, 'height': 600}
-        ],
-        'categories': [
-            {'id': 1, 'name': 'person'},
-            {'id': 2, 'name': 'car'}
-        ],
-        'annotations': [
-            {
-                'id': 1, 'image_id': 1, 'category_id': 1,
-                'segmentation': [[10, 10, 50, 10, 50, 50, 10, 50]],
-                'area': 1600, 'bbox': [10, 10, 40, 40]
-            },
-            {
-                'id': 2, 'image_id': 1, 'category_id': 2,
-                'segmentation': [[100, 100, 150, 100, 150, 150, 100, 150]],
-                'area': 2500, 'bbox': [100, 100, 50, 50]
-            },
-            {
-                'id': 3, 'image_id': 2, 'category_id': 1,
-                'segmentation': [[20, 20, 60, 20, 60, 60, 20, 60]],
-                'area': 1600, 'bbox': [20, 20, 40, 40]
-            }
-        ]
-    }
+def initialized_category_controller(sample_coco_data):
+    """Fresh CategoryController initialized from the sample data."""
+    controller = CategoryController()
+    controller.initialize_categories(sample_coco_data)
+    return controller
+
+
+@pytest.fixture
+def initialized_navigation_controller(sample_coco_data):
+    """Fresh NavigationController initialized from the sample data."""
+    controller = NavigationController()
+    controller.initialize_images(sample_coco_data)
+    return controller
+
+
+class _RecordingLayer:
+    """Shapes layer stand-in that logs event blocking, attribute writes and refreshes in order."""
+    
+    _ATTRIBUTES = ('data', 'properties', 'face_color', 'edge_color', 'edge_width', 'shape_type', 'name')
+    
+    def __init__(self, blocker_error=None):
+        object.__setattr__(self, 'log', [])
+        object.__setattr__(self, 'events', SimpleNamespace(blocker_all=self._blocker_all))
+        object.__setattr__(self, '_blocker_error', blocker_error)
+        for attr in self._ATTRIBUTES:
+            object.__setattr__(self, attr, None)
+    
+    @contextmanager
+    def _blocker_all(self):
+        if self._blocker_error is not None:
+            raise self._blocker_error
+        self.log.append('block')
+        yield
+        self.log.append('unblock')
+    
+    def __setattr__(self, key, value):
+        self.log.append(key)
+        object.__setattr__(self, key, value)
+    
+    def refresh(self):
+        self.log.append('refresh')
 
 
 @pytest.fixture
-def temp_coco_file(sample_coco_data):
-    """Create temporary COCO file for testing."""
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(sample_coco_data, f)
-        return f.name
+def display_controller():
+    """Fresh DisplayController with default settings."""
+    return DisplayController()
 
 
 class TestCocoFileManager:
@@ -84,6 +94,44 @@ class TestCocoFileManager:
         assert info['num_categories'] == 2
         assert info['file_name'] == Path(temp_coco_file).name
     
+    def test_annotation_index(self, temp_coco_file):
+        """Test columnar annotation index built from loaded data."""
+        manager = CocoFileManager()
+        assert manager.annotation_index is None
+
+        manager.load_file(temp_coco_file)
+        index = manager.annotation_index
+        assert manager.annotation_index is index  # Cached while data is unchanged
+
+        assert list(index.select(1)) == [0, 1]
+        assert list(index.select(1, [2])) == [1]
+        assert list(index.select(2)) == [2]
+        assert len(index.select(999)) == 0
+        assert index.category_counts() == {1: 2, 2: 1}
+
+    def test_annotation_index_tolerates_malformed_ids(self):
+        """Test null or string IDs are indexed under 0 instead of failing the index build."""
+        index = build_annotation_index({'annotations': [
+            {'id': 1, 'image_id': 1, 'category_id': 1},
+            {'id': 2, 'image_id': None, 'category_id': "2"},
+            {'id': 3, 'image_id': 1, 'category_id': None},
+        ]})
+        
+        assert list(index.select(1)) == [0, 2]
+        assert list(index.select(0)) == [1]
+        assert index.category_counts() == {0: 2, 1: 1}
+    
+    def test_annotation_index_accepts_integral_float_ids(self):
+        """Test float image IDs such as 1.0 are indexed under their integer value."""
+        index = build_annotation_index({'annotations': [
+            {'id': 1, 'image_id': 1.0, 'category_id': 2.0},
+            {'id': 2, 'image_id': 1, 'category_id': 1},
+        ]})
+        
+        assert list(index.select(1)) == [0, 1]
+        assert len(index.select(0)) == 0
+        assert index.category_counts() == {1: 1, 2: 1}
+    
     def test_invalid_file_loading(self):
         """Test loading of invalid files."""
         manager = CocoFileManager()
@@ -110,10 +158,9 @@ class TestCategoryController:
         assert len(controller.category_colors) == 0
         assert len(controller.categories) == 0
     
-    def test_category_initialization(self, sample_coco_data):
+    def test_category_initialization(self, initialized_category_controller):
         """Test category initialization from COCO data."""
-        controller = CategoryController()
-        controller.initialize_categories(sample_coco_data)
+        controller = initialized_category_controller
         
         assert len(controller.categories) == 2
         assert 1 in controller.categories
@@ -129,10 +176,9 @@ class TestCategoryController:
         assert 1 in controller.category_colors
         assert 2 in controller.category_colors
     
-    def test_category_toggle(self, sample_coco_data):
+    def test_category_toggle(self, initialized_category_controller):
         """Test category visibility toggle."""
-        controller = CategoryController()
-        controller.initialize_categories(sample_coco_data)
+        controller = initialized_category_controller
         
         # Toggle category 1 off
         controller.toggle_category(1, False)
@@ -143,10 +189,28 @@ class TestCategoryController:
         controller.toggle_category(1, True)
         assert controller.category_states[1] is True
     
-    def test_get_selected_categories(self, sample_coco_data):
-        """Test getting selected categories."""
+    def test_sparse_and_negative_category_ids(self):
+        """Test large and negative IDs get their own state without a dense mask."""
         controller = CategoryController()
-        controller.initialize_categories(sample_coco_data)
+        controller.initialize_categories({'categories': [
+            {'id': -1, 'name': 'negative'},
+            {'id': 3, 'name': 'small'},
+            {'id': 10**6, 'name': 'large'},
+        ]})
+        
+        assert controller._states.nbytes == 3
+        controller.toggle_category(-1, False)
+        assert controller.category_states == {-1: False, 3: True, 10**6: True}
+        assert controller.get_selected_categories().tolist() == [3, 10**6]
+        assert not controller.is_category_enabled(-1)
+        assert not controller.is_category_enabled(4)
+        
+        with pytest.raises(KeyError):
+            controller.toggle_category(2, False)
+    
+    def test_get_selected_categories(self, initialized_category_controller):
+        """Test getting selected categories."""
+        controller = initialized_category_controller
         
         # Initially all selected
         selected = controller.get_selected_categories()
@@ -160,11 +224,22 @@ class TestCategoryController:
         assert len(selected) == 1
         assert 1 not in selected
         assert 2 in selected
-    
-    def test_select_all_none(self, sample_coco_data):
+
+    def test_selected_categories_cached_until_toggle(self, initialized_category_controller):
+        """Test selected IDs are reused between toggles and recomputed after."""
+        controller = initialized_category_controller
+
+        selected = controller.get_selected_categories()
+        assert controller.get_selected_categories() is selected
+        assert not selected.flags.writeable
+
+        controller.toggle_category(2, False)
+        assert controller.get_selected_categories() is not selected
+        assert list(controller.get_selected_categories()) == [1]
+
+    def test_select_all_none(self, initialized_category_controller):
         """Test select all and select none functionality."""
-        controller = CategoryController()
-        controller.initialize_categories(sample_coco_data)
+        controller = initialized_category_controller
         
         # Select none
         controller.select_none()
@@ -178,10 +253,9 @@ class TestCategoryController:
         assert 1 in selected
         assert 2 in selected
     
-    def test_get_category_color(self, sample_coco_data):
+    def test_get_category_color(self, initialized_category_controller):
         """Test getting category colors."""
-        controller = CategoryController()
-        controller.initialize_categories(sample_coco_data)
+        controller = initialized_category_controller
         
         color1 = controller.get_category_color(1)
         color2 = controller.get_category_color(2)
@@ -198,6 +272,30 @@ class TestCategoryController:
         unknown_color = controller.get_category_color(999)
         assert unknown_color == (1.0, 1.0, 1.0, 1.0)
 
+    def test_get_category_rgb_sparse_ids(self):
+        """Test RGB lookup by position keeps sparse IDs small and negative IDs white."""
+        controller = CategoryController()
+        controller.initialize_categories({'categories': [
+            {'id': 3, 'name': 'small'}, {'id': 10**9, 'name': 'large'},
+        ]})
+        
+        assert controller._color_lut.shape == (2, 4)
+        expected = tuple(int(c * 255) for c in controller.get_category_color(10**9)[:3])
+        assert controller.get_category_rgb(10**9) == expected
+        assert controller.get_category_rgb(-1) == (255, 255, 255)
+    
+    def test_get_category_rgb(self, initialized_category_controller):
+        """Test 8-bit RGB lookup matches the float RGBA colors."""
+        controller = initialized_category_controller
+
+        for cat_id in (1, 2):
+            color = controller.get_category_color(cat_id)
+            expected = tuple(int(c * 255) for c in color[:3])
+            assert controller.get_category_rgb(cat_id) == expected
+
+        # Unknown category should return white
+        assert controller.get_category_rgb(999) == (255, 255, 255)
+
 
 class TestNavigationController:
     """Test cases for NavigationController."""
@@ -208,20 +306,18 @@ class TestNavigationController:
         assert controller.current_image_idx == 0
         assert len(controller.images) == 0
     
-    def test_image_initialization(self, sample_coco_data):
+    def test_image_initialization(self, initialized_navigation_controller):
         """Test image initialization from COCO data."""
-        controller = NavigationController()
-        controller.initialize_images(sample_coco_data)
+        controller = initialized_navigation_controller
         
         assert len(controller.images) == 2
         assert controller.current_image_idx == 0
         assert controller.images[0]['file_name'] == 'image1.jpg'
         assert controller.images[1]['file_name'] == 'image2.jpg'
     
-    def test_get_current_image(self, sample_coco_data):
+    def test_get_current_image(self, initialized_navigation_controller):
         """Test getting current image info."""
-        controller = NavigationController()
-        controller.initialize_images(sample_coco_data)
+        controller = initialized_navigation_controller
         
         current = controller.get_current_image()
         assert current is not None
@@ -231,37 +327,36 @@ class TestNavigationController:
         current_id = controller.get_current_image_id()
         assert current_id == 1
     
-    def test_navigation_methods(self, sample_coco_data):
-        """Test navigation functionality."""
-        controller = NavigationController()
-        controller.initialize_images(sample_coco_data)
-        
-        # Initially at first image
-        assert controller.current_image_idx == 0
-        assert not controller.can_go_previous()
-        assert controller.can_go_next()
-        
-        # Navigate to next
-        result = controller.go_next()
-        assert result is True
-        assert controller.current_image_idx == 1
-        assert controller.can_go_previous()
-        assert not controller.can_go_next()
-        
-        # Navigate back
-        result = controller.go_previous()
-        assert result is True
-        assert controller.current_image_idx == 0
-        
-        # Try to go beyond bounds
-        result = controller.go_previous()
-        assert result is False
-        assert controller.current_image_idx == 0
+    @pytest.mark.parametrize(
+        "ops,expected_idx,expected_result",
+        [
+            ([], 0, None),
+            (["next"], 1, True),
+            (["next", "next"], 1, False),
+            (["next", "previous"], 0, True),
+            (["previous"], 0, False),
+            (["next", "previous", "previous"], 0, False),
+        ],
+    )
+    def test_navigation_methods(
+        self, initialized_navigation_controller, ops, expected_idx, expected_result
+    ):
+        """Test navigation functionality for a sequence of moves."""
+        controller = initialized_navigation_controller
+        
+        result = None
+        for op in ops:
+            result = controller.go_next() if op == "next" else controller.go_previous()
+        
+        assert result is expected_result
+        assert controller.current_image_idx == expected_idx
+        # Sample data has two images, so position decides which moves are possible
+        assert controller.can_go_previous() == (expected_idx > 0)
+        assert controller.can_go_next() == (expected_idx < len(controller.images) - 1)
     
-    def test_navigate_to_image(self, sample_coco_data):
+    def test_navigate_to_image(self, initialized_navigation_controller):
         """Test direct navigation to specific image index."""
-        controller = NavigationController()
-        controller.initialize_images(sample_coco_data)
+        controller = initialized_navigation_controller
         
         # Navigate to valid index
         result = controller.navigate_to_image(1)
@@ -301,9 +396,8 @@ class TestNavigationController:
 class TestVisualizationManager:
     """Test cases for VisualizationManager."""
     
-    def test_initialization(self):
+    def test_initialization(self, mock_viewer):
         """Test visualization manager initialization."""
-        mock_viewer = Mock()
         manager = VisualizationManager(mock_viewer)
         
         assert manager.viewer is mock_viewer
@@ -311,36 +405,107 @@ class TestVisualizationManager:
         assert manager.visualizer is None
         assert manager.n_filter_value is None
     
-    def test_visualizer_initialization(self, sample_coco_data):
+    def test_visualizer_initialization(self, mock_viewer, sample_coco_data):
         """Test visualizer initialization."""
-        mock_viewer = Mock()
         manager = VisualizationManager(mock_viewer)
         
         manager.initialize_visualizer(sample_coco_data)
         assert manager.visualizer is not None
     
-    def test_n_filter_setting(self):
+    def test_visualizer_reuses_prebuilt_index(self, mock_viewer, temp_coco_file):
+        """Test the visualizer shares the file manager's annotation index."""
+        file_manager = CocoFileManager()
+        data = file_manager.load_file(temp_coco_file)
+        
+        manager = VisualizationManager(mock_viewer)
+        manager.initialize_visualizer(data, annotation_index=file_manager.annotation_index)
+        assert manager.visualizer.annotation_index is file_manager.annotation_index
+    
+    def test_shape_colors_for_sparse_and_unknown_categories(self, mock_viewer):
+        """Test shape colors are gathered by category position, with white for unknown IDs."""
+        data = {
+            'images': [{'id': 1, 'file_name': 'image1.jpg', 'width': 10, 'height': 10}],
+            'categories': [{'id': 3, 'name': 'small'}, {'id': 10**9, 'name': 'large'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 10**9, 'bbox': [0, 0, 2, 2]},
+                {'id': 2, 'image_id': 1, 'category_id': -1, 'bbox': [0, 0, 2, 2]},
+                {'id': 3, 'image_id': 1, 'category_id': 3, 'bbox': [0, 0, 2, 2]},
+            ]
+        }
+        manager = VisualizationManager(mock_viewer)
+        manager.initialize_visualizer(data)
+        visualizer = manager.visualizer
+        visualizer.clear_cache()
+        
+        _, layer_kwargs, _ = visualizer.create_shapes_layer(1, show_mask=False)
+        
+        assert visualizer._color_lut.shape == (3, 4)
+        expected = [visualizer.category_colors[10**9], (1.0, 1.0, 1.0, 1.0),
+                    visualizer.category_colors[3]]
+        np.testing.assert_allclose(layer_kwargs['edge_color'], expected)
+    
+    def test_n_filter_setting(self, mock_viewer):
         """Test N-filter value setting."""
-        mock_viewer = Mock()
         manager = VisualizationManager(mock_viewer)
         
         manager.set_n_filter(100)
         assert manager.n_filter_value == 100
     
-    def test_cleanup(self):
+    @pytest.fixture
+    def layer_update(self, mock_viewer):
+        """Manager with a stub visualizer and a recording layer already in the viewer."""
+        def attach(layer):
+            shapes = [np.zeros((4, 2))]
+            layer_kwargs = {'face_color': 'red', 'shape_type': ['rectangle']}
+            manager = VisualizationManager(mock_viewer)
+            manager.visualizer = SimpleNamespace(
+                create_shapes_layer=lambda *args, **kwargs: (shapes, dict(layer_kwargs), 'shapes')
+            )
+            mock_viewer.layers.append(layer)
+            manager.current_shapes_layer = layer
+            return manager, shapes
+        return attach
+    
+    def test_layer_update_batched(self, mock_viewer, layer_update):
+        """Test in-place updates run inside the event blocker and refresh the layer once."""
+        layer = _RecordingLayer()
+        manager, shapes = layer_update(layer)
+        
+        manager.refresh_visualization(1, [1], "image1.jpg")
+        
+        assert layer.log[0] == 'block'
+        unblock = layer.log.index('unblock')
+        assert set(layer.log[1:unblock]) == {'data', 'face_color', 'shape_type', 'edge_width'}
+        assert layer.log[unblock + 1:] == ['refresh', 'name']
+        assert layer.data is shapes
+        assert layer.name == 'COCO Annotations - image1.jpg'
+        assert manager.current_shapes_layer is layer
+        mock_viewer.add_shapes.assert_not_called()
+    
+    def test_layer_update_falls_back_to_new_layer(self, mock_viewer, layer_update):
+        """Test a failing event blocker replaces the layer instead of updating it."""
+        layer = _RecordingLayer(blocker_error=RuntimeError("blocker unavailable"))
+        manager, shapes = layer_update(layer)
+        
+        manager.refresh_visualization(1, [1], "image1.jpg")
+        
+        assert 'refresh' not in layer.log
+        assert layer not in mock_viewer.layers
+        mock_viewer.add_shapes.assert_called_once()
+        assert mock_viewer.add_shapes.call_args.args[0] is shapes
+        assert manager.current_shapes_layer is mock_viewer.add_shapes.return_value
+    
+    def test_cleanup(self, mock_viewer):
         """Test visualization cleanup."""
-        mock_viewer = Mock()
-        mock_layer = Mock()
-        mock_layers = Mock()
-        mock_layers.__contains__ = Mock(return_value=True)  # Mock the 'in' operator
-        mock_viewer.layers = mock_layers
+        layer = object()
+        mock_viewer.layers.append(layer)
         
         manager = VisualizationManager(mock_viewer)
-        manager.current_shapes_layer = mock_layer
+        manager.current_shapes_layer = layer
         
         manager.cleanup()
         assert manager.current_shapes_layer is None
-        mock_layers.remove.assert_called_once_with(mock_layer)
+        assert layer not in mock_viewer.layers
 
 
 class TestDisplayController:
@@ -352,9 +517,9 @@ class TestDisplayController:
         assert controller.n_filter_value == 1000
         assert controller.visualization_mode == 'overlay'
     
-    def test_n_filter_setting(self):
+    def test_n_filter_setting(self, display_controller):
         """Test N-filter value setting."""
-        controller = DisplayController()
+        controller = display_controller
         
         controller.set_n_filter(500)
         assert controller.n_filter_value == 500
@@ -363,9 +528,9 @@ class TestDisplayController:
         controller.set_n_filter(-10)
         assert controller.n_filter_value == 1  # Should be at least 1
     
-    def test_visualization_mode_setting(self):
+    def test_visualization_mode_setting(self, display_controller):
         """Test visualization mode setting."""
-        controller = DisplayController()
+        controller = display_controller
         
         controller.set_visualization_mode('masked')
         assert controller.visualization_mode == 'masked'
@@ -377,47 +542,102 @@ class TestDisplayController:
         controller.set_visualization_mode('invalid')
         assert controller.visualization_mode == 'overlay'  # Should remain unchanged
     
-    def test_annotation_count_info(self, sample_coco_data):
-        """Test annotation count information."""
-        controller = DisplayController()
-        
-        # Test with no data
-        info = controller.get_annotation_count_info({}, 1, [1])
+    def test_annotation_count_info_without_data(self, display_controller):
+        """Test annotation count information with no data loaded."""
+        info = display_controller.get_annotation_count_info({}, 1, [1])
         assert info == {'visible': 0, 'total': 0}
+    
+    @pytest.mark.parametrize(
+        "image_id,categories",
+        [(1, [1, 2]), (1, [1]), (1, [2]), (2, [1, 2]), (2, [2])],
+    )
+    def test_annotation_count_info(self, display_controller, sample_coco_data,
+                                   annotation_counts, image_id, categories):
+        """Test annotation counts against the precomputed count table."""
+        expected = {
+            'visible': sum(annotation_counts.get((image_id, c), 0) for c in categories),
+            'total': sum(annotation_counts.values()),
+        }
         
-        # Test with sample data
-        info = controller.get_annotation_count_info(sample_coco_data, 1, [1, 2])
-        assert info['visible'] == 2  # Image 1 has 2 annotations
-        assert info['total'] == 3    # Total across all images
+        info = display_controller.get_annotation_count_info(
+            sample_coco_data, image_id, categories
+        )
+        assert info == expected
         
-        # Test with category filter
-        info = controller.get_annotation_count_info(sample_coco_data, 1, [1])
-        assert info['visible'] == 1  # Only category 1 annotations
-        assert info['total'] == 3    # Total unchanged
+        # Repeated calls are served from the cache with identical results
+        assert display_controller.get_annotation_count_info(
+            sample_coco_data, image_id, categories
+        ) == expected
+    
+    def test_annotation_count_info_with_prebuilt_index(self, display_controller, temp_coco_file,
+                                                       annotation_counts):
+        """Test counts computed from the file manager's annotation index."""
+        manager = CocoFileManager()
+        data = manager.load_file(temp_coco_file)
         
-        # Test with different image
-        info = controller.get_annotation_count_info(sample_coco_data, 2, [1, 2])
-        assert info['visible'] == 1  # Image 2 has 1 annotation
-        assert info['total'] == 3    # Total unchanged
+        info = display_controller.get_annotation_count_info(
+            data, 1, [1], annotation_index=manager.annotation_index
+        )
+        assert info == {'visible': annotation_counts[(1, 1)],
+                        'total': sum(annotation_counts.values())}
+    
+    def test_annotation_count_cache_follows_dataset(self, display_controller, sample_coco_data):
+        """Test cached counts are dropped when a different dataset is passed."""
+        assert display_controller.get_annotation_count_info(
+            sample_coco_data, 1, [1, 2]
+        )['visible'] == 2
+        
+        reduced = dict(sample_coco_data, annotations=sample_coco_data['annotations'][:1])
+        info = display_controller.get_annotation_count_info(reduced, 1, [1, 2])
+        assert info == {'visible': 1, 'total': 1}
+    
+    def test_annotation_count_cache_bounded(self, display_controller, sample_coco_data):
+        """Test the count cache keeps a bounded number of entries and can be released."""
+        from napari_cocoutils._controllers import COUNT_CACHE_SIZE
+        
+        for image_id in range(COUNT_CACHE_SIZE + 10):
+            display_controller.get_annotation_count_info(sample_coco_data, image_id, [1])
+        assert display_controller._count_cache.size() == COUNT_CACHE_SIZE
+        
+        display_controller.clear_count_cache()
+        assert display_controller._count_cache.size() == 0
+        assert display_controller._count_source is None
+        assert display_controller._count_index is None
+
+
+@pytest.fixture(scope="class")
+def wired_controllers(temp_coco_file):
+    """
+    All controllers wired to the sample file, built once per test class.
+    
+    The controllers are shared by every test in the class, so state changes
+    such as navigation or category toggles carry over between tests.
+    """
+    file_manager = CocoFileManager()
+    data = file_manager.load_file(temp_coco_file)
+    category_controller = CategoryController()
+    category_controller.initialize_categories(data)
+    navigation_controller = NavigationController()
+    navigation_controller.initialize_images(data)
+    return SimpleNamespace(
+        file_manager=file_manager,
+        category_controller=category_controller,
+        navigation_controller=navigation_controller,
+        display_controller=DisplayController(),
+        data=data,
+    )
 
 
 class TestControllersIntegration:
     """Integration tests for controller interactions."""
     
-    def test_full_workflow(self, temp_coco_file, sample_coco_data):
+    def test_full_workflow(self, wired_controllers):
         """Test complete workflow with all controllers."""
-        # Initialize all controllers
-        file_manager = CocoFileManager()
-        category_controller = CategoryController()
-        nav_controller = NavigationController()
-        display_controller = DisplayController()
-        
-        # Load file
-        data = file_manager.load_file(temp_coco_file)
-        
-        # Initialize other controllers
-        category_controller.initialize_categories(data)
-        nav_controller.initialize_images(data)
+        file_manager = wired_controllers.file_manager
+        category_controller = wired_controllers.category_controller
+        nav_controller = wired_controllers.navigation_controller
+        display_controller = wired_controllers.display_controller
+        data = wired_controllers.data
         
         # Test workflow
         assert file_manager.is_loaded()
@@ -438,4 +658,4 @@ class TestControllersIntegration:
         assert current_image_id == 2
         assert len(selected_categories) == 1
         assert 1 in selected_categories
-        assert count_info['visible'] == 1  # Image 2, category 1 only
\ No newline at end of file
+        assert count_info['visible'] == 1  # Image 2, category 1 only
@@ -5,52 +5,35 @@ Tests the complete workflow from COCO file loading to napari visualization
 using the actual sample data files referenced in the project roadmap.
 """
 
+import json
+import logging
 import pytest
 import numpy as np
-from pathlib import Path
-from unittest.mock import Mock
+from collections import defaultdict
 
-import napari
-from napari_cocoutils._reader import coco_reader
-from napari_cocoutils._widget import CocoWidget
-
-
-# Test data paths from roadmap
-SAMPLE_COCO_FILE = "/Users/santiago/switchdrive/boeck_lab_projects/cocoutils/test.json"
-SAMPLE_IMAGES = [
-    "/Users/santiago/switchdrive/boeck_lab_projects/cocoutils/data/objects_reconstructed/coli_mask_frame_223.tiff",
-    "/Users/santiago/switchdrive/boeck_lab_projects/cocoutils/data/objects_reconstructed/mabs_img_01.tiff"
-]
+napari = pytest.importorskip("napari", reason="integration tests need napari")
 
+from napari_cocoutils._reader import coco_reader, bbox_array_to_polygons
+from napari_cocoutils._widget import CocoWidget
 
-@pytest.fixture
-def real_coco_file():
-    """Fixture providing real COCO test file path."""
-    coco_path = Path(SAMPLE_COCO_FILE)
-    if not coco_path.exists():
-        pytest.skip(f"Sample COCO file not found: {SAMPLE_COCO_FILE}")
-    return str(coco_path)
+logger = logging.getLogger(__name__)
 
 
-@pytest.fixture
-def real_image_files():
-    """Fixture providing real image file paths."""
-    available_images = []
-    for img_path in SAMPLE_IMAGES:
-        if Path(img_path).exists():
-            available_images.append(img_path)
-    
-    if not available_images:
-        pytest.skip("No sample images found")
-    return available_images
+@pytest.fixture(scope="session")
+def loaded_coco_layers(real_coco_file):
+    """Reader output for the real COCO file, parsed once per session."""
+    layer_data_list = coco_reader(real_coco_file)
+    assert layer_data_list is not None
+    return layer_data_list
 
 
+@pytest.mark.integration
 class TestRealDataIntegration:
     """Integration tests using real COCO data."""
     
-    def test_load_real_coco_file(self, real_coco_file):
+    def test_load_real_coco_file(self, loaded_coco_layers):
         """Test loading the actual test.json COCO file."""
-        result = coco_reader(real_coco_file)
+        result = loaded_coco_layers
         
         assert result is not None
         assert isinstance(result, list)
@@ -65,28 +48,24 @@ class TestRealDataIntegration:
         
         # Should have significant number of annotations (based on roadmap: 6,145)
         assert len(data) > 1000
-        print(f"Loaded {len(data)} annotations from real COCO file")
+        logger.debug("Loaded %d annotations from real COCO file", len(data))
         
         # Check category distribution
         properties = metadata['properties']
-        categories = set(prop['category_name'] for prop in properties)
-        print(f"Found categories: {categories}")
+        categories = set(properties['category_name'])
+        logger.debug("Found categories: %s", categories)
         assert len(categories) >= 2  # Should have multiple categories
     
-    def test_napari_visualization_workflow(self, real_coco_file):
+    @pytest.mark.serial
+    @pytest.mark.xdist_group("napari_viewer")
+    def test_napari_visualization_workflow(self, loaded_coco_layers):
         """Test complete napari visualization workflow."""
-        pytest.importorskip("napari")
-        
         # Create headless viewer
         viewer = napari.Viewer(show=False)
         
         try:
-            # Load COCO data via reader
-            layer_data_list = coco_reader(real_coco_file)
-            assert layer_data_list is not None
-            
             # Add layer to viewer
-            shapes_data, metadata, layer_type = layer_data_list[0]
+            shapes_data, metadata, layer_type = loaded_coco_layers[0]
             layer = viewer.add_shapes(shapes_data, **metadata)
             
             # Verify layer was created
@@ -102,22 +81,15 @@ class TestRealDataIntegration:
             assert hasattr(layer, 'face_color')
             assert hasattr(layer, 'edge_color')
             
-            print(f"Successfully visualized {len(shapes_data)} shapes in napari")
+            logger.debug("Successfully visualized %d shapes in napari", len(shapes_data))
             
         finally:
             viewer.close()
     
-    def test_widget_with_real_data(self, real_coco_file):
+    def test_widget_with_real_data(self, real_coco_file, fake_viewer):
         """Test widget functionality with real COCO data."""
-        pytest.importorskip("napari")
-        
-        # Create mock viewer to avoid GUI issues
-        mock_viewer = Mock(spec=napari.Viewer)
-        mock_viewer.layers = Mock()
-        mock_viewer.add_shapes = Mock(return_value=Mock())
-        
-        # Create widget
-        widget = CocoWidget(mock_viewer)
+        # Create widget on a stub viewer to avoid GUI issues
+        widget = CocoWidget(fake_viewer)
         
         # Load real file
         widget.file_manager.load_file(real_coco_file)
@@ -131,7 +103,7 @@ class TestRealDataIntegration:
         assert file_info['num_images'] >= 2  # Should have 2 images
         assert file_info['num_categories'] >= 5  # Should have 5 categories
         
-        print(f"File info: {file_info}")
+        logger.debug("File info: %s", file_info)
         
         # Initialize controllers
         widget.category_controller.initialize_categories(widget.file_manager.coco_data)
@@ -165,7 +137,7 @@ class TestRealDataIntegration:
         filtered_selected = widget.category_controller.get_selected_categories()
         assert len(filtered_selected) == len(categories) - 1
         
-        print(f"Category filtering test passed with {len(categories)} categories")
+        logger.debug("Category filtering test passed with %d categories", len(categories))
     
     def test_performance_with_large_dataset(self, real_coco_file):
         """Test performance with the large real dataset."""
@@ -182,8 +154,8 @@ class TestRealDataIntegration:
         # Should load reasonably quickly even with 6K+ annotations
         assert load_time < 10.0, f"Loading took {load_time:.2f}s, which is too slow"
         
-        print(f"Loaded {num_annotations} annotations in {load_time:.2f}s")
-        print(f"Performance: {num_annotations/load_time:.0f} annotations/second")
+        logger.debug("Loaded %d annotations in %.2fs", num_annotations, load_time)
+        logger.debug("Performance: %.0f annotations/second", num_annotations / load_time)
         
         # Memory usage check - shapes should be reasonable size
         shapes_data = result[0][0]
@@ -193,7 +165,10 @@ class TestRealDataIntegration:
         # Should not use excessive memory
         assert memory_estimate_mb < 100, f"Estimated memory usage too high: {memory_estimate_mb:.1f}MB"
         
-        print(f"Estimated memory usage: {memory_estimate_mb:.1f}MB for {total_points} coordinate points")
+        logger.debug(
+            "Estimated memory usage: %.1fMB for %d coordinate points",
+            memory_estimate_mb, total_points
+        )
 
 
 class TestErrorHandlingIntegration:
@@ -224,15 +199,9 @@ class TestErrorHandlingIntegration:
         result = coco_reader(str(invalid_coco))
         assert result is None
     
-    def test_widget_error_recovery(self):
+    def test_widget_error_recovery(self, fake_viewer):
         """Test widget error recovery mechanisms."""
-        pytest.importorskip("napari")
-        
-        mock_viewer = Mock(spec=napari.Viewer)
-        mock_viewer.layers = Mock()
-        mock_viewer.add_shapes = Mock(return_value=Mock())
-        
-        widget = CocoWidget(mock_viewer)
+        widget = CocoWidget(fake_viewer)
         
         # Should handle invalid file gracefully
         try:
@@ -247,51 +216,79 @@ class TestErrorHandlingIntegration:
 class TestCoordinateSystemIntegration:
     """Test coordinate system handling in integration scenarios."""
     
-    def test_coordinate_conversion_consistency(self, real_coco_file):
-        """Test that coordinate conversions are consistent."""
+    @pytest.mark.integration
+    def test_coordinate_conversion_consistency(self, loaded_coco_layers, real_coco_file):
+        """Test every reader shape matches coordinates computed independently from the raw file."""
         from napari_cocoutils._utils import (
             convert_coco_to_napari_coordinates,
             convert_napari_to_coco_coordinates
         )
         
-        # Load real data to get actual COCO polygons
-        result = coco_reader(real_coco_file)
-        shapes_data, metadata, _ = result[0]
+        shapes_data, metadata, _ = loaded_coco_layers[0]
+        with open(real_coco_file) as f:
+            annotations = json.load(f)['annotations']
+        
+        # Flat COCO [x1, y1, ...] coordinates of every shape the reader should emit:
+        # each polygon of a segmented annotation, otherwise the bbox corners
+        # clockwise from top-left
+        expected = []
+        for ann in annotations:
+            segmentation = ann.get('segmentation')
+            if segmentation:
+                expected.extend(
+                    (ann['category_id'], seg) for seg in segmentation
+                    if isinstance(seg, list) and len(seg) >= 6
+                )
+            elif len(ann.get('bbox') or []) == 4:
+                x, y, w, h = ann['bbox']
+                expected.append((ann['category_id'], [x, y, x + w, y, x + w, y + h, x, y + h]))
+        # The reader groups shapes by category and keeps file order within one
+        expected.sort(key=lambda item: item[0])
+        
+        assert len(shapes_data) == len(expected)
+        np.testing.assert_array_equal(
+            metadata['properties']['category_id'], [cat_id for cat_id, _ in expected]
+        )
         
-        # Test round-trip conversion on first few shapes
-        for i, shape in enumerate(shapes_data[:5]):
-            # Convert napari shape back to COCO format
-            coco_coords = convert_napari_to_coco_coordinates(shape)
-            
-            # Convert back to napari format
-            napari_coords = convert_coco_to_napari_coordinates(coco_coords)
+        # Group shapes by vertex count so each group is checked as one (k, L, 2) array
+        groups = defaultdict(list)
+        for i, (_, flat) in enumerate(expected):
+            groups[len(flat) // 2].append(i)
+        
+        for n_vertices, indices in groups.items():
+            actual = np.stack([shapes_data[i] for i in indices])
+            flat = np.array([expected[i][1] for i in indices], dtype=np.float64)
+            napari_expected = flat.reshape(len(indices), n_vertices, 2)[..., ::-1]
             
-            # Should be very close (allowing for floating point precision)
-            np.testing.assert_array_almost_equal(shape, napari_coords, decimal=10)
+            # Reader output is stored as float32
+            np.testing.assert_allclose(actual, napari_expected, rtol=1e-6,
+                                       err_msg=f"{n_vertices}-vertex shapes")
             
-            print(f"Shape {i}: Round-trip conversion successful")
+            # The per-shape helpers agree with the raw file for every shape
+            np.testing.assert_allclose(
+                [convert_napari_to_coco_coordinates(shape) for shape in actual], flat, rtol=1e-6
+            )
+            np.testing.assert_allclose(
+                [convert_coco_to_napari_coordinates(coords) for coords in flat], napari_expected
+            )
     
     def test_bbox_to_polygon_consistency(self):
         """Test that bounding box to polygon conversion is consistent."""
-        # Test with simple bounding box
-        bbox = [10, 20, 30, 40]  # [x, y, width, height]
-        
-        # Expected polygon (clockwise from top-left)
+        # Simple bounding box [x, y, width, height], clockwise from top-left
         expected_points = np.array([
             [20, 10],      # top-left (row, col)
             [20, 40],      # top-right
-            [60, 40],      # bottom-right  
+            [60, 40],      # bottom-right
             [60, 10]       # bottom-left
         ])
+        np.testing.assert_array_equal(
+            bbox_array_to_polygons(np.array([[10, 20, 30, 40]]))[0], expected_points
+        )
         
-        # This tests the conversion logic in the reader
-        x, y, w, h = bbox
-        rect_points = np.array([
-            [y, x],           # top-left
-            [y, x + w],       # top-right
-            [y + h, x + w],   # bottom-right
-            [y + h, x]        # bottom-left
+        # Batched output must match the per-box corner construction
+        bboxes = np.random.default_rng(0).uniform(0, 500, size=(1000, 4))
+        scalar = np.array([
+            [[y, x], [y, x + w], [y + h, x + w], [y + h, x]]
+            for x, y, w, h in bboxes
         ])
-        
-        np.testing.assert_array_equal(rect_points, expected_points)
-        print("Bounding box to polygon conversion is correct")
\ No newline at end of file
+        np.testing.assert_array_equal(bbox_array_to_polygons(bboxes), scalar)
@@ -5,37 +5,52 @@ Tests memory usage, loading times, and responsiveness with large datasets
 to ensure the plugin can handle real-world COCO annotation files efficiently.
 """
 
+import json
 import pytest
 import time
-import psutil
-import os
-from pathlib import Path
-from unittest.mock import Mock
+import tracemalloc
 
 import napari
 from napari_cocoutils._reader import coco_reader
 from napari_cocoutils._widget import CocoWidget
 
 
-# Test data path
-SAMPLE_COCO_FILE = "/Users/santiago/switchdrive/boeck_lab_projects/cocoutils/test.json"
+@pytest.fixture
+def performance_coco_file(real_coco_file):
+    """Fixture for performance testing with real data."""
+    return real_coco_file
 
 
 @pytest.fixture
-def performance_coco_file():
-    """Fixture for performance testing with real data."""
-    coco_path = Path(SAMPLE_COCO_FILE)
-    if not coco_path.exists():
-        pytest.skip(f"Performance test file not found: {SAMPLE_COCO_FILE}")
-    return str(coco_path)
+def traced_memory():
+    """Trace Python allocations for the duration of a memory test.
+
+    Tracing is scoped to the memory tests so that its overhead does not
+    skew the timing assertions elsewhere in this module.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    yield
+    if started:
+        tracemalloc.stop()
 
 
 def get_memory_usage():
-    """Get current memory usage in MB."""
-    process = psutil.Process(os.getpid())
-    return process.memory_info().rss / 1024 / 1024
+    """Get current traced Python memory usage in MB."""
+    return tracemalloc.get_traced_memory()[0] / 1024 / 1024
 
 
+def reader_allocations(before, after):
+    """Bytes allocated from ``_reader.py`` between two tracemalloc snapshots."""
+    return sum(
+        stat.size_diff
+        for stat in after.compare_to(before, 'filename')
+        if stat.traceback[0].filename.endswith('_reader.py')
+    )
+
+
+@pytest.mark.integration
 class TestLoadingPerformance:
     """Test file loading performance metrics."""
     
@@ -71,7 +86,7 @@ class TestLoadingPerformance:
         
         assert throughput > 5000, f"Throughput too low: {throughput:.0f} ann/sec"
     
-    def test_memory_usage_during_loading(self, performance_coco_file):
+    def test_memory_usage_during_loading(self, performance_coco_file, traced_memory):
         """Test memory usage during file loading."""
         # Baseline memory
         baseline_memory = get_memory_usage()
@@ -128,9 +143,12 @@ class TestLoadingPerformance:
         assert std_dev < 0.1, f"Performance too inconsistent: {std_dev:.3f}s std_dev"
 
 
+@pytest.mark.integration
 class TestVisualizationPerformance:
     """Test napari visualization performance."""
     
+    @pytest.mark.serial
+    @pytest.mark.xdist_group("napari_viewer")
     def test_napari_layer_creation_speed(self, performance_coco_file):
         """Test napari layer creation performance."""
         pytest.importorskip("napari")
@@ -166,6 +184,8 @@ class TestVisualizationPerformance:
         finally:
             viewer.close()
     
+    @pytest.mark.serial
+    @pytest.mark.xdist_group("napari_viewer")
     def test_layer_property_access_speed(self, performance_coco_file):
         """Test speed of accessing layer properties."""
         pytest.importorskip("napari")
@@ -203,17 +223,13 @@ class TestVisualizationPerformance:
 class TestWidgetPerformance:
     """Test widget interaction performance."""
     
-    def test_widget_initialization_speed(self):
+    def test_widget_initialization_speed(self, fake_viewer):
         """Test widget initialization performance."""
         pytest.importorskip("napari")
         
-        mock_viewer = Mock(spec=napari.Viewer)
-        mock_viewer.layers = Mock()
-        mock_viewer.add_shapes = Mock(return_value=Mock())
-        
         # Benchmark widget creation
         start_time = time.perf_counter()
-        widget = CocoWidget(mock_viewer)
+        widget = CocoWidget(fake_viewer)
         end_time = time.perf_counter()
         
         init_time = end_time - start_time
@@ -223,19 +239,16 @@ class TestWidgetPerformance:
         assert init_time < 0.1, f"Widget initialization too slow: {init_time:.6f}s"
         
         # Verify widget components
-        assert widget.viewer is mock_viewer
+        assert widget.viewer is fake_viewer
         assert widget.file_manager is not None
         assert widget.category_controller is not None
     
-    def test_large_dataset_widget_performance(self, performance_coco_file):
+    @pytest.mark.integration
+    def test_large_dataset_widget_performance(self, performance_coco_file, fake_viewer):
         """Test widget performance with large dataset."""
         pytest.importorskip("napari")
         
-        mock_viewer = Mock(spec=napari.Viewer)
-        mock_viewer.layers = Mock()
-        mock_viewer.add_shapes = Mock(return_value=Mock())
-        
-        widget = CocoWidget(mock_viewer)
+        widget = CocoWidget(fake_viewer)
         
         # Benchmark file loading through widget
         start_time = time.perf_counter()
@@ -274,15 +287,12 @@ class TestWidgetPerformance:
         
         assert toggle_time < 0.1, f"Category operations too slow: {toggle_time:.6f}s"
     
-    def test_filtering_performance(self, performance_coco_file):
+    @pytest.mark.integration
+    def test_filtering_performance(self, performance_coco_file, fake_viewer):
         """Test annotation filtering performance."""
         pytest.importorskip("napari")
         
-        mock_viewer = Mock(spec=napari.Viewer)
-        mock_viewer.layers = Mock()
-        mock_viewer.add_shapes = Mock(return_value=Mock())
-        
-        widget = CocoWidget(mock_viewer)
+        widget = CocoWidget(fake_viewer)
         widget.file_manager.load_file(performance_coco_file)
         widget.category_controller.initialize_categories(widget.file_manager.coco_data)
         widget.navigation_controller.initialize_images(widget.file_manager.coco_data)
@@ -327,37 +337,34 @@ class TestWidgetPerformance:
         assert avg_filter_time < 0.05, f"Filtering too slow: {avg_filter_time:.6f}s"
 
 
+@pytest.mark.integration
 class TestMemoryEfficiency:
     """Test memory usage patterns and efficiency."""
     
-    def test_memory_scaling(self, performance_coco_file):
-        """Test how memory usage scales with data size."""
-        # Load full dataset
-        result = coco_reader(performance_coco_file)
-        full_shapes = result[0][0]
-        full_memory = get_memory_usage()
+    def test_memory_scaling(self, performance_coco_file, traced_memory, tmp_path):
+        """Test how reader allocations scale with the number of annotations."""
+        with open(performance_coco_file) as f:
+            coco_data = json.load(f)
+        annotations = coco_data['annotations']
         
-        # Test with subsets
         subset_sizes = [100, 500, 1000, 2000]
         memory_per_annotation = []
         
         for size in subset_sizes:
-            if size >= len(full_shapes):
+            if size >= len(annotations):
                 continue
-                
-            # Create subset
-            subset_shapes = full_shapes[:size]
-            subset_metadata = {
-                'properties': result[0][1]['properties'][:size],
-                'face_color': result[0][1]['face_color'][:size],
-                'edge_color': result[0][1]['edge_color'][:size],
-                'shape_type': result[0][1]['shape_type'][:size],
-                'name': f'Subset {size}'
-            }
             
-            subset_memory = get_memory_usage()
-            memory_increase = subset_memory - full_memory
-            memory_per_annotation.append(memory_increase / size * 1024)  # KB per annotation
+            subset_file = tmp_path / f"subset_{size}.json"
+            subset_file.write_text(json.dumps({**coco_data, 'annotations': annotations[:size]}))
+            
+            before = tracemalloc.take_snapshot()
+            result = coco_reader(str(subset_file))
+            after = tracemalloc.take_snapshot()
+            
+            num_shapes = len(result[0][0])
+            allocated = reader_allocations(before, after)
+            memory_per_annotation.append(allocated / num_shapes / 1024)  # KB per annotation
+            del result
         
         # Memory usage should scale roughly linearly
         if len(memory_per_annotation) > 1:
@@ -369,7 +376,7 @@ class TestMemoryEfficiency:
             # Variation should be reasonable (not exponential scaling)
             assert variation < avg_memory, "Memory usage doesn't scale linearly"
     
-    def test_cleanup_efficiency(self, performance_coco_file):
+    def test_cleanup_efficiency(self, performance_coco_file, traced_memory):
         """Test memory cleanup after operations."""
         baseline_memory = get_memory_usage()
         
@@ -7,9 +7,12 @@ COCO file detection, validation, and conversion to napari layers.
 
 import pytest
 import json
-import tempfile
+import numpy as np
 from pathlib import Path
-from napari_cocoutils._reader import coco_reader, _is_coco_file, _convert_coco_to_napari
+from napari_cocoutils._reader import (
+    coco_reader, _is_coco_file, _convert_coco_to_napari,
+    flat_polygons_to_napari
+)
 
 
 @pytest.fixture
@@ -44,31 +47,31 @@ def sample_coco_data():
 
 
 @pytest.fixture
-def temp_coco_file(sample_coco_data):
+def temp_coco_file(tmp_path, sample_coco_data):
     """Fixture providing temporary COCO JSON file."""
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(sample_coco_data, f)
-        return f.name
+    path = tmp_path / "coco.json"
+    path.write_text(json.dumps(sample_coco_data))
+    return str(path)
 
 
 @pytest.fixture
-def invalid_json_file():
+def invalid_json_file(tmp_path):
     """Fixture providing invalid JSON file."""
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        f.write("invalid json content {")
-        return f.name
+    path = tmp_path / "invalid.json"
+    path.write_text("invalid json content {")
+    return str(path)
 
 
 @pytest.fixture
-def non_coco_json_file():
+def non_coco_json_file(tmp_path):
     """Fixture providing valid JSON but non-COCO structure."""
     non_coco_data = {
         'some_other_field': 'value',
         'data': [1, 2, 3, 4]
     }
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(non_coco_data, f)
-        return f.name
+    path = tmp_path / "non_coco.json"
+    path.write_text(json.dumps(non_coco_data))
+    return str(path)
 
 
 class TestCocoReader:
@@ -90,9 +93,43 @@ class TestCocoReader:
         data, metadata, layer_type = layer_data
         assert layer_type == 'shapes'
         assert isinstance(metadata, dict)
+    
+    def test_coco_reader_parses_file_once(self, temp_coco_file, monkeypatch):
+        """Test validation and conversion share a single JSON parse."""
+        from napari_cocoutils import _reader
+        
+        calls = []
+        original = _reader._load_json
+        monkeypatch.setattr(
+            _reader, "_load_json", lambda p, **kw: calls.append(p) or original(p, **kw)
+        )
+        
+        assert coco_reader(temp_coco_file) is not None
+        assert len(calls) == 1
+    
+    @pytest.mark.parametrize("fails", [False, True], ids=["success", "error"])
+    def test_coco_reader_pauses_garbage_collector(self, temp_coco_file, monkeypatch, fails):
+        """Test the collector is paused while a file is read and restored afterwards."""
+        import gc
+        from napari_cocoutils import _reader
+        
+        seen = []
+        original = _reader._convert_coco_to_napari
         
-        # Clean up
-        Path(temp_coco_file).unlink()
+        def convert(*args, **kwargs):
+            seen.append(gc.isenabled())
+            if fails:
+                raise ValueError("conversion failed")
+            return original(*args, **kwargs)
+        
+        monkeypatch.setattr(_reader, "_convert_coco_to_napari", convert)
+        assert gc.isenabled()
+        
+        result = coco_reader(temp_coco_file)
+        
+        assert (result is None) is fails
+        assert seen == [False]
+        assert gc.isenabled()
     
     def test_coco_reader_with_invalid_json(self, invalid_json_file):
         """Test reader with invalid JSON file."""
@@ -100,9 +137,6 @@ class TestCocoReader:
         
         # Should return None for invalid JSON
         assert result is None
-        
-        # Clean up
-        Path(invalid_json_file).unlink()
     
     def test_coco_reader_with_non_coco_file(self, non_coco_json_file):
         """Test reader with valid JSON but non-COCO structure."""
@@ -110,23 +144,16 @@ class TestCocoReader:
         
         # Should return None for non-COCO JSON
         assert result is None
-        
-        # Clean up
-        Path(non_coco_json_file).unlink()
     
-    def test_coco_reader_with_non_json_file(self):
+    def test_coco_reader_with_non_json_file(self, tmp_path):
         """Test reader with non-JSON file."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write("This is not a JSON file")
-            txt_file = f.name
+        txt_file = tmp_path / "not_coco.txt"
+        txt_file.write_text("This is not a JSON file")
         
-        result = coco_reader(txt_file)
+        result = coco_reader(str(txt_file))
         
         # Should return None for non-JSON files
         assert result is None
-        
-        # Clean up
-        Path(txt_file).unlink()
     
     def test_coco_reader_with_nonexistent_file(self):
         """Test reader with nonexistent file."""
@@ -135,6 +162,39 @@ class TestCocoReader:
         # Should return None for missing files
         assert result is None
     
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_load_json_backends(self, temp_coco_file, sample_coco_data, monkeypatch, use_orjson):
+        """Test orjson and stdlib JSON parsing return the same data."""
+        from napari_cocoutils import _reader
+        
+        if use_orjson:
+            if _reader.orjson is None:
+                pytest.skip("orjson not installed")
+        else:
+            monkeypatch.setattr(_reader, "orjson", None)
+        
+        assert _reader._load_json(temp_coco_file) == sample_coco_data
+    
+    @pytest.mark.parametrize("content", [
+        "  [1, 2, 3]",
+        '{"some_other_field": "value", "data": [1, 2, 3, 4]}',
+        '{"images": [], "categories": []}',
+    ], ids=["array", "other-object", "missing-annotations"])
+    def test_non_coco_json_rejected_before_parsing(self, tmp_path, monkeypatch, content):
+        """Test files that cannot hold a COCO object are never decoded."""
+        from napari_cocoutils import _reader
+        
+        candidate_file = tmp_path / "candidate.json"
+        candidate_file.write_text(content)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("file should not be parsed")
+        
+        monkeypatch.setattr(_reader.json, "loads", fail)
+        monkeypatch.setattr(_reader, "orjson", None)
+        assert _reader._load_json(candidate_file, accept=_reader._looks_like_coco) is None
+        assert not _is_coco_file(str(candidate_file))
+    
     def test_is_coco_file_validation(self, sample_coco_data):
         """Test COCO file format validation."""
         from napari_cocoutils._utils import validate_coco_structure
@@ -207,6 +267,42 @@ class TestCocoReader:
         # Check polygon shape
         polygon = data[0]
         assert polygon.shape == (4, 2)  # 4 points, 2 coordinates each
+        assert polygon.dtype == np.float32
+    
+    def test_flat_polygons_match_per_polygon_conversion(self):
+        """Test the batched polygon conversion against the per-polygon helper."""
+        from napari_cocoutils._utils import convert_coco_to_napari_coordinates
+        
+        segs = [[10, 10, 30, 10, 30, 30], [0, 0, 5, 0, 5, 5, 0, 5], [1.5, 2.5, 3, 4, 5, 6]]
+        coords = np.concatenate([np.asarray(seg, dtype=np.float64) for seg in segs])
+        lengths = np.array([len(seg) // 2 for seg in segs])
+        
+        polygons = flat_polygons_to_napari(coords, lengths)
+        
+        assert len(polygons) == len(segs)
+        for seg, polygon in zip(segs, polygons):
+            np.testing.assert_array_equal(polygon, convert_coco_to_napari_coordinates(seg))
+    
+    def test_polygons_share_one_vertex_buffer(self):
+        """Test converted polygons are views into a single allocation."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'test_category'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 1,
+                 'segmentation': [[10, 10, 30, 10, 30, 30], [40, 40, 60, 40, 60, 60, 40, 60]]},
+                {'id': 2, 'image_id': 1, 'category_id': 1,
+                 'segmentation': [[0, 0, 5, 0, 5, 5]]},
+            ]
+        }
+        
+        data, _, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        assert [len(polygon) for polygon in data] == [3, 4, 3]
+        buffer = data[0].base
+        assert buffer is not None
+        assert all(polygon.base is buffer for polygon in data)
+        assert buffer.shape == (10, 2)
     
     def test_convert_coco_bbox_annotations(self):
         """Test conversion of COCO bounding box annotations."""
@@ -294,8 +390,8 @@ class TestCocoReader:
         assert len(data) == 2  # One polygon + one rectangle
         
         # Check metadata
-        assert len(metadata['properties']) == 2
-        assert len(metadata['shape_type']) == 2
+        assert len(metadata['properties']['category_id']) == 2
+        assert metadata['shape_type'] == ['polygon', 'rectangle']
     
     def test_category_colors_and_properties(self, sample_coco_data):
         """Test that categories get proper colors and properties."""
@@ -303,14 +399,16 @@ class TestCocoReader:
         
         data, metadata, layer_type = result[0]
         
-        # Check properties
+        # Check properties: one column per field, one entry per shape
         properties = metadata['properties']
-        assert len(properties) >= 1
+        for column in ('category_id', 'category_name', 'annotation_id', 'area'):
+            assert column in properties
+            assert len(properties[column]) == len(data)
         
-        for prop in properties:
-            assert 'category_id' in prop
-            assert 'category_name' in prop
-            assert 'annotation_id' in prop
+        # Names follow the declared categories
+        names = {cat['id']: cat['name'] for cat in sample_coco_data['categories']}
+        for cat_id, name in zip(properties['category_id'], properties['category_name']):
+            assert name == names[cat_id]
         
         # Check colors
         assert 'face_color' in metadata
@@ -322,10 +420,164 @@ class TestCocoReader:
         assert len(face_colors) == len(data)
         assert len(edge_colors) == len(data)
         
-        # Each color should be RGBA tuple
-        for color in face_colors:
-            assert isinstance(color, tuple)
-            assert len(color) == 4  # RGBA
+        # Colors are gathered from the category palette as an (N, 4) RGBA array
+        assert np.asarray(face_colors).shape == (len(data), 4)
+        
+        # Shapes of the same category share a color, unknown IDs fall back to white
+        category_ids = list(properties['category_id'])
+        for i, cat_id in enumerate(category_ids):
+            first = category_ids.index(cat_id)
+            np.testing.assert_array_equal(face_colors[i], face_colors[first])
+    
+    def test_unknown_category_colored_white(self):
+        """Test shapes whose category is not declared get the white fallback."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'known'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 1, 'bbox': [0, 0, 5, 5]},
+                {'id': 2, 'image_id': 1, 'category_id': 7, 'bbox': [5, 5, 5, 5]},
+            ]
+        }
+        
+        data, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        np.testing.assert_array_equal(metadata['face_color'][1], [1.0, 1.0, 1.0, 1.0])
+        assert not np.array_equal(metadata['face_color'][0], metadata['face_color'][1])
+    
+    def test_malformed_ids_fall_back_to_defaults(self):
+        """Test null or string IDs load under the default category instead of failing the file."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'default'}],
+            'annotations': [
+                {'id': None, 'image_id': 1, 'category_id': None, 'bbox': [0, 0, 5, 5]},
+                {'id': 2, 'image_id': 1, 'category_id': "3", 'bbox': [5, 5, 5, 5]},
+            ]
+        }
+        
+        data, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        properties = metadata['properties']
+        assert len(data) == 2
+        assert list(properties['category_id']) == [1, 1]
+        assert list(properties['category_name']) == ['default', 'default']
+        assert list(properties['annotation_id']) == [0, 2]
+    
+    def test_integral_float_ids_kept(self):
+        """Test IDs written as integral floats resolve to their integer value."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'first'}, {'id': 2, 'name': 'second'}],
+            'annotations': [
+                {'id': 5.0, 'image_id': 1, 'category_id': 2.0, 'bbox': [0, 0, 5, 5]},
+                {'id': 6, 'image_id': 1, 'category_id': 2.5, 'bbox': [5, 5, 5, 5]},
+            ]
+        }
+        
+        data, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        properties = metadata['properties']
+        assert len(data) == 2
+        assert list(properties['category_id']) == [1, 2]
+        assert list(properties['category_name']) == ['first', 'second']
+        assert list(properties['annotation_id']) == [6, 5]
+    
+    def test_shapes_grouped_by_category(self):
+        """Test shapes come out sorted by category with all columns kept aligned."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 2, 'bbox': [0, 0, 5, 5]},
+                {'id': 2, 'image_id': 1, 'category_id': 1,
+                 'segmentation': [[10, 10, 30, 10, 30, 30]]},
+                {'id': 3, 'image_id': 1, 'category_id': 2, 'bbox': [5, 5, 5, 5]},
+                {'id': 4, 'image_id': 1, 'category_id': 1, 'bbox': [0, 5, 5, 5]},
+            ]
+        }
+        
+        data, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        properties = metadata['properties']
+        
+        assert list(properties['category_id']) == [1, 1, 2, 2]
+        assert list(properties['annotation_id']) == [2, 4, 1, 3]
+        assert metadata['shape_type'] == ['polygon', 'rectangle', 'rectangle', 'rectangle']
+        assert len(data[0]) == 3
+        np.testing.assert_array_equal(data[2], [[0, 0], [0, 5], [5, 5], [5, 0]])
+        np.testing.assert_array_equal(metadata['face_color'][0], metadata['face_color'][1])
+        assert not np.array_equal(metadata['face_color'][1], metadata['face_color'][2])
+    
+    def test_category_names_share_one_object(self):
+        """Test shapes of the same category reuse a single name string."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'known'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 1, 'bbox': [0, 0, 5, 5]},
+                {'id': 2, 'image_id': 1, 'category_id': 1, 'bbox': [5, 5, 5, 5]},
+                {'id': 3, 'image_id': 1, 'category_id': 7, 'bbox': [0, 5, 5, 5]},
+                {'id': 4, 'image_id': 1, 'category_id': 7, 'bbox': [5, 0, 5, 5]},
+            ]
+        }
+        
+        _, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        names = metadata['properties']['category_name']
+        
+        assert list(names) == ['known', 'known', 'category_7', 'category_7']
+        assert names[0] is names[1]
+        assert names[2] is names[3]
+    
+    def test_non_string_category_name(self):
+        """Test numeric category names are shown as text instead of failing the file."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 42}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 1, 'bbox': [0, 0, 5, 5]},
+            ]
+        }
+        
+        _, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        assert list(metadata['properties']['category_name']) == ['42']
+    
+    def test_non_numeric_bbox_skipped(self):
+        """Test a bbox holding null or non-finite values is not turned into a NaN rectangle."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'test_category'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 1, 'bbox': [0, None, 1, 1]},
+                {'id': 2, 'image_id': 1, 'category_id': 1, 'bbox': [0, float('nan'), 1, 1]},
+                {'id': 3, 'image_id': 1, 'category_id': 1, 'bbox': [10, 20, 30, 40]},
+            ]
+        }
+        
+        data, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        assert len(data) == 1
+        assert list(metadata['properties']['annotation_id']) == [3]
+        assert np.isfinite(data[0]).all()
+    
+    def test_malformed_polygon_skipped(self):
+        """Test a polygon with non-numeric coordinates does not fail the other shapes."""
+        coco_data = {
+            'images': [{'id': 1, 'file_name': 'test.jpg', 'width': 100, 'height': 100}],
+            'categories': [{'id': 1, 'name': 'test_category'}],
+            'annotations': [
+                {'id': 1, 'image_id': 1, 'category_id': 1,
+                 'segmentation': [["a", 1, 2, 3, 4, 5]]},
+                {'id': 2, 'image_id': 1, 'category_id': 1,
+                 'segmentation': [[10, 10, 30, 10, 30, 30], [0, None, 5, 0, 5, 5]]},
+            ]
+        }
+        
+        data, metadata, _ = _convert_coco_to_napari(coco_data, "test.json")[0]
+        
+        assert len(data) == 1
+        assert list(metadata['properties']['annotation_id']) == [2]
+        np.testing.assert_array_equal(data[0], [[10, 10], [10, 30], [30, 30]])
     
     def test_invalid_annotation_handling(self):
         """Test handling of invalid/malformed annotations."""
@@ -368,4 +620,5 @@ class TestCocoReader:
         
         # Should only have one valid shape (invalid ones filtered out)
         assert len(data) == 1
-        assert len(metadata['properties']) == 1
\ No newline at end of file
+        assert len(metadata['properties']['annotation_id']) == 1
+        assert metadata['properties']['annotation_id'][0] == 3
\ No newline at end of file